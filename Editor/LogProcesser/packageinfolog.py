@@ -1,18 +1,50 @@
 # coding=utf-8
 
+import io
 import pathlib
 import re
 import logging
+
+from Editor import sectionindex
+
 L = logging.getLogger()
 
 
+# Bumped when the parsed output changes so that json written by an older parser is converted again
+PARSER_VERSION = 1
+
+# Divider between the chapters of a package summary
+CHAPTER_DIVIDER = "--------------------------------------------"
+
+# First line of the chapters that are parsed
+PACKAGE_INFO_CHAPTER = "Filename: "
+PACKAGE_REFERENCES_CHAPTER = "Packages referenced by "
+ASSET_REGISTRY_CHAPTER = "Asset Registry Size: "
+IMPORTS_CHAPTER = "Import"
+EXPORTS_CHAPTER = "Export"
+
+# Fields of the json data, the import and export tables are large and are only parsed when asked for
+DATA_FIELDS = ["UnrealFileName", "AssetPath", "AssetType", "PackageInfo", "PackageReferences", "AssetRegistry",
+               "Imports", "Exports"]
+DEPENDENCY_FIELDS = ["Imports", "Exports"]
+
+FILENAME_PATTERN = re.compile(r'.*?Filename: (.*).*')
+ASSET_TYPE_PATTERN = re.compile(r'0\) (.*?)\'')
+
+# First line of each entry in the import and export tables
+DEPENDENCY_ENTRY_PATTERN = re.compile(r'\b(Import|Export) -?\d+: ')
+
+# Asset registry values that are not readable
+ASSET_REGISTRY_VALUES_TO_SKIP = ["FiBData"]
+
+
 class PkgLogObject:
 
     """
     Takes in a raw pkgInfo log file and extracts relevant infomation out of it.  Saves the output file as a json file
     """
 
-    def __init__(self, path_to_log):
+    def __init__(self, path_to_log, package_path=None, section=None, lines=None):
 
         # Init the dictionary that will hold the cleaned up data
         self.log_dict = {}
@@ -21,30 +53,34 @@ class PkgLogObject:
         self.log_file_path = pathlib.Path(path_to_log)
 
         # Saving values
-        self.raw_log_lines = ""
+        self.raw_log_lines = lines or ""
         self.asset_name = ""
         self.absolute_package_path = ""
         self._log_chapters = []
 
+        # Everything parsed from the log in a single pass
+        self._parsed_data = None
+
+        # Offset and length of the package in a raw log that holds several packages
+        self.section = section
+
+        # Files with the same content share a log, the package path overwrites the file name found in the log
+        self.package_path_override = ""
+        if package_path:
+            self.package_path_override = str(package_path)
+            self.absolute_package_path = self.package_path_override
+
     def _get_absolute_package_path(self):
         """
         Finds the package path from the log file from disk
         :return:
         """
 
-        if self.absolute_package_path:
-            return pathlib.Path(self.absolute_package_path)
-
-        # Search through the file for the filename
-        result = None
-        for each_line in self._get_log_lines():
-            result = re.search('.*?Filename: (.*).*', each_line)
-            if result:
-                self.absolute_package_path = result.group(1)
-                break
+        if not self.absolute_package_path:
+            self.absolute_package_path = self._parse()["Filename"]
 
-        if not result:
-            L.error("Unable to find filename in %s", self.log_file_path)
+            if not self.absolute_package_path:
+                L.error("Unable to find filename in %s", self.log_file_path)
 
         return pathlib.Path(self.absolute_package_path)
 
@@ -77,126 +113,245 @@ class PkgLogObject:
         if self.raw_log_lines:
             return self.raw_log_lines
 
+        if self.section:
+            offset, length = self.section
+            section_data = sectionindex.read_section(self.log_file_path, offset, length)
+
+            # Splitting the lines the same way as reading the log as a text file
+            self.raw_log_lines = io.StringIO(section_data.decode("utf8", errors="ignore"), newline=None).readlines()
+            return self.raw_log_lines
+
         f = open(self.log_file_path, "r", encoding="utf8", errors="ignore")
         self.raw_log_lines = f.readlines()
         f.close()
 
         return self.raw_log_lines
 
-    def get_data(self):
-
-        self.log_dict["UnrealFileName"] = self.get_asset_name()
-        self.log_dict["AssetPath"] = self.get_relative_package_path()
-        self.log_dict["AssetType"] = self.get_asset_type()
-        self.log_dict["PackageInfo"] = self.get_package_info()
-        self.log_dict["PackageReferences"] = self.get_package_references()
-        self.log_dict["AssetRegistry"] = self.get_asset_references()
-
-        self.log_dict["Imports"] = []
-        self.log_dict["Exports"] = []
+    def get_data(self, fields=None, include_dependencies=False):
+        """
+        :param fields: names of the fields to return, defaults to all of them
+        :param include_dependencies: parses the import and export tables, they are left empty otherwise.  Asking for
+        the Imports or Exports field parses them as well
+        :return: dict of the data
+        """
 
-        return self.log_dict
+        if fields is None:
+            fields = DATA_FIELDS
+        else:
+            for each_field in fields:
+                if each_field not in DATA_FIELDS:
+                    L.warning("Unknown package info field: %s, valid fields: %s", each_field, ", ".join(DATA_FIELDS))
 
-    def _get_chapter_from_first_line(self, first_line_string):
+            include_dependencies = include_dependencies or any(each in DEPENDENCY_FIELDS for each in fields)
 
-        package_info_chapter = []
-        for each_chapter in self.get_log_chapters():
-            first_line = each_chapter[0].lstrip()
+        field_getters = {"UnrealFileName": self.get_asset_name,
+                         "AssetPath": self.get_relative_package_path,
+                         "AssetType": self.get_asset_type,
+                         "PackageInfo": self.get_package_info,
+                         "PackageReferences": self.get_package_references,
+                         "AssetRegistry": self.get_asset_references,
+                         "Imports": self.get_imports if include_dependencies else list,
+                         "Exports": self.get_exports if include_dependencies else list}
 
-            if first_line.startswith(first_line_string):
-                package_info_chapter = each_chapter
-                break
+        # Every call gets its own dict so the fields of an earlier call don't end up in the result
+        self.log_dict = dict((each_field, field_getters[each_field]()) for each_field in DATA_FIELDS
+                             if each_field in fields)
 
-        return package_info_chapter
+        return self.log_dict
 
-    def get_package_info(self):
+    def _parse(self, include_dependencies=False):
         """
-        Formats the package info
-        :return:
+        Goes through the log once and collects the data of every chapter.  The kind of a chapter is decided by its
+        first line and only the first chapter of each kind is used
+        :param include_dependencies: collects the lines of the import and export tables
+        :return: dict of the parsed data
         """
-        package_info_chapter = self._get_chapter_from_first_line("Filename: ")
 
+        if self._parsed_data is not None and (self._parsed_data["ImportLines"] is not None or not include_dependencies):
+            return self._parsed_data
+
+        filename = ""
+        asset_type = ""
         package_info = {}
-        for each_line in package_info_chapter:
-            each_line = each_line.strip()
+        package_references = {}
+        asset_registry = {}
+        import_lines = []
+        export_lines = []
+
+        # The line handler for the chapter being read, None for chapters that are skipped
+        chapter_handler = None
+        chapters_found = set()
+        is_first_line_of_chapter = True
+
+        def _handle_package_info_line(line):
+            line = line.strip()
 
             # Skipping empty strings
-            if not each_line:
-                continue
+            if not line:
+                return
 
-            split = each_line.split(": ")
+            split = line.split(": ")
             try:
                 # Adding the first and second part to the package info dict
                 package_info[split[0]] = self._format_value(split[1])
             except IndexError:
-                L.debug("Data parse not implemented for: %s ", each_line)
+                L.debug("Data parse not implemented for: %s ", line)
 
-        return package_info
+        def _handle_package_references_line(line):
+            line_split = line.strip().split(") ")
+            if line_split[0].isnumeric():
+                package_references[line_split[0]] = line_split[1]
 
-    def get_package_references(self):
+        def _handle_asset_registry_line(line):
+            nonlocal asset_type
 
-        package_ref = {}
-        package_info_chapter = self._get_chapter_from_first_line("Packages referenced by ")
+            line = line.strip()
 
-        for each_line in package_info_chapter:
-            each_line = each_line.lstrip().rstrip()
-            line_split = each_line.split(") ")
-            if line_split[0].isnumeric():
-                package_ref[line_split[0]] = line_split[1]
+            # Skipping empty strings
+            if not line:
+                return
 
-        return package_ref
+            # The first asset reference has the type of the asset
+            if not asset_type:
+                asset_match_obj = ASSET_TYPE_PATTERN.search(line)
+                if asset_match_obj:
+                    asset_type = asset_match_obj.group(1)
 
-    def get_asset_type(self):
-        asset_reference_chapter = self._get_chapter_from_first_line("Asset Registry Size: ")
-        asset_type = ""
-        for each_line in asset_reference_chapter:
-            line = each_line.strip()
-            # Check for the first asset reference to get the type
+            if line.startswith("\""):
+                line = line.replace("\"", "")
+                split = line.split(": ")
+
+                if len(split) > 2:
+                    asset_registry[split[0]] = self._split_complex_asset_data_value(line)
+                else:
+                    try:
+                        key = split[0]
+                        value = split[1]
+
+                        if key not in ASSET_REGISTRY_VALUES_TO_SKIP:
+                            asset_registry[key] = self._format_value(value)
 
-            asset_match_obj = re.search(r'0\) (.*?)\'', line)
-            if asset_match_obj:
-                asset_type = asset_match_obj.group(1)
-                break
+                    except IndexError:
+                        print("Unable to parse %s ", line)
+
+        chapter_handlers = [(PACKAGE_INFO_CHAPTER, _handle_package_info_line),
+                            (PACKAGE_REFERENCES_CHAPTER, _handle_package_references_line),
+                            (ASSET_REGISTRY_CHAPTER, _handle_asset_registry_line)]
+
+        if include_dependencies:
+            # Only keeping the lines, the tables are parsed when they are asked for
+            chapter_handlers += [(IMPORTS_CHAPTER, import_lines.append),
+                                 (EXPORTS_CHAPTER, export_lines.append)]
+
+        for each_line in self._iterate_log_lines():
+
+            if CHAPTER_DIVIDER in each_line:
+                chapter_handler = None
+                is_first_line_of_chapter = True
+                continue
+
+            if is_first_line_of_chapter:
+                is_first_line_of_chapter = False
+
+                first_line = each_line.lstrip()
+                for chapter_first_line, handler in chapter_handlers:
+                    if chapter_first_line not in chapters_found and first_line.startswith(chapter_first_line):
+                        chapters_found.add(chapter_first_line)
+                        chapter_handler = handler
+                        break
+
+            if not filename and "Filename: " in each_line:
+                filename = FILENAME_PATTERN.search(each_line).group(1)
+
+            if chapter_handler:
+                chapter_handler(each_line)
 
         if not asset_type:
-            L.warning("Unable to determine asset type from lines: %s ", asset_reference_chapter)
+            L.warning("Unable to determine asset type from: %s ", self.log_file_path)
+
+        self._parsed_data = {"Filename": filename,
+                             "AssetType": asset_type,
+                             "PackageInfo": package_info,
+                             "PackageReferences": package_references,
+                             "AssetRegistry": asset_registry,
+                             "ImportLines": import_lines if include_dependencies else None,
+                             "ExportLines": export_lines if include_dependencies else None}
+
+        return self._parsed_data
+
+    def _iterate_log_lines(self):
+        """
+        Lines of the log, files are read while they are parsed instead of being loaded up front
+        """
+
+        if self.raw_log_lines or self.section:
+            yield from self._get_log_lines()
+            return
+
+        with open(self.log_file_path, "r", encoding="utf8", errors="ignore") as f:
+            yield from f
+
+    def get_package_info(self):
+        """
+        Formats the package info
+        :return:
+        """
 
-        return asset_type
+        package_info = dict(self._parse()["PackageInfo"])
+
+        if self.package_path_override and "Filename" in package_info:
+            package_info["Filename"] = self.package_path_override
+
+        return package_info
+
+    def get_package_references(self):
+        return dict(self._parse()["PackageReferences"])
+
+    def get_asset_type(self):
+        return self._parse()["AssetType"]
 
     def get_asset_references(self):
-        asset_reference_chapter = self._get_chapter_from_first_line("Asset Registry Size: ")
+        return dict(self._parse()["AssetRegistry"])
 
-        values_to_skip = ["FiBData"]
+    def get_imports(self):
+        """
+        Parses the import table
+        :return: list with a dict for each import
+        """
 
-        asset_reference = {}
-        for each_line in asset_reference_chapter:
-            each_line = each_line.strip()
+        return self._parse_dependency_table(self._parse(include_dependencies=True)["ImportLines"], IMPORTS_CHAPTER)
 
-            # Skipping empty strings
-            if not each_line:
-                continue
+    def get_exports(self):
+        """
+        Parses the export table
+        :return: list with a dict for each export
+        """
 
-            if each_line.startswith("\""):
-                each_line = each_line.replace("\"", "")
-                split = each_line.split(": ")
+        return self._parse_dependency_table(self._parse(include_dependencies=True)["ExportLines"], EXPORTS_CHAPTER)
 
-                if len(split) > 2:
-                    asset_reference[split[0]] = self._split_complex_asset_data_value(each_line)
-                    continue
-                else:
-                    try:
-                        key = split[0]
-                        value = split[1]
+    @staticmethod
+    def _parse_dependency_table(lines, type_of_data):
+        """
+        Splits the table into the lines of each entry and parses the entries one by one
+        """
 
-                        if key in values_to_skip:
-                            continue
+        entries = []
+        entry_lines = None
+        for each_line in lines:
+            entry_match = DEPENDENCY_ENTRY_PATTERN.search(each_line)
+            if entry_match and entry_match.group(1) == type_of_data:
+                if entry_lines:
+                    entries.append(DependencyListObject(entry_lines, type_of_data).get_dict())
+                entry_lines = [each_line]
 
-                        asset_reference[key] = self._format_value(value)
+            # Lines before the first entry are the header of the table
+            elif entry_lines is not None:
+                entry_lines.append(each_line)
 
-                    except IndexError:
-                        print("Unable to parse %s ", each_line)
+        if entry_lines:
+            entries.append(DependencyListObject(entry_lines, type_of_data).get_dict())
 
-        return asset_reference
+        return entries
 
     def _split_complex_asset_data_value(self, line):
         """
@@ -239,15 +394,13 @@ class PkgLogObject:
         if self._log_chapters:
             return self._log_chapters
 
-        # Divider
-        chapter_divider = "--------------------------------------------"
         lines = self._get_log_lines()
         self._log_chapters = []
 
         each_chapter = []
         for line_no, each_raw_line in enumerate(lines):
 
-            if chapter_divider in each_raw_line:
+            if CHAPTER_DIVIDER in each_raw_line:
                 self._log_chapters.append(each_chapter)
                 each_chapter = []
             else:
@@ -307,8 +460,8 @@ class BaseDataParser:
         # Cleaning any invalid symbols
         formatted_value = BaseDataParser._clean_symbols_from_string(value_string,
                                                                     invalid_value_symbols)
-        # Convert to float if value is numeric
-        if value_string.isnumeric():
+        # Convert to float if value is numeric, table indexes can be negative
+        if value_string.lstrip("-").isnumeric():
             formatted_value = float(value_string)
             return formatted_value
 
@@ -333,6 +486,7 @@ class DependencyListObject(BaseDataParser):
         self.import_prefix = "LogPackageUtilities: Display:"
         self.export_prefix = "LogPackageUtilities: Warning:"
         self.index_line_flag = type_of_data + " "
+        self.index_key = type_of_data + " Index"
         self.all_depends_list_flag = "All Depends"
         self.depends_map_line_flag = "DependsMap"
 
@@ -406,6 +560,8 @@ class DependencyListObject(BaseDataParser):
             else:
                 return all_depends
 
+        return all_depends
+
     def parse_lines(self):
 
         """
@@ -437,7 +593,7 @@ class DependencyListObject(BaseDataParser):
                     self.processed_line_numbers.append(line_no)
 
                     parsed_data_dict["Name"] = self._format_value(name_value)
-                    parsed_data_dict["Import Index"] = self._format_value(import_index_value)
+                    parsed_data_dict[self.index_key] = self._format_value(import_index_value)
 
             elif self.all_depends_list_flag in clean_line:
                 all_depends = self.extract_depends_list(line_no+1)
@@ -448,13 +604,16 @@ class DependencyListObject(BaseDataParser):
                 parsed_data_dict["DependsMap"] = depends_map
 
             else:
-                line_split = clean_line.split(" ")
+                # Values can contain spaces, the key is everything up to the first colon
+                line_split = clean_line.split(": ", 1)
+                if len(line_split) < 2:
+                    line_split = clean_line.split(" ")
 
                 if len(line_split) > 1:
                     key = line_split[0]
                     value = line_split[1]
 
-                    key = self._clean_symbols_from_string(key, ["'"])
+                    key = self._clean_symbols_from_string(key, ["'", ":"])
                     value = self._clean_symbols_from_string(value, ["'"])
 
                     parsed_data_dict[key] = self._format_value(value)
@@ -0,0 +1,159 @@
+# coding=utf-8
+import json
+import logging
+import os
+import pathlib
+import time
+
+L = logging.getLogger(__name__)
+
+
+class ArchiveManifest:
+    """
+    Persistent list of the hash values stored in the archive so that checking the archive does not depend on listing
+    the archive folder.  The manifest is held as a dictionary for constant time lookups and is written atomically
+    """
+
+    MANIFEST_FILE_NAME = "_archive_manifest.json"
+    MANIFEST_VERSION = 1
+
+    def __init__(self, archive_folder_path):
+
+        self.archive_folder_path = pathlib.Path(archive_folder_path)
+        self.manifest_file_path = self.archive_folder_path.joinpath(self.MANIFEST_FILE_NAME)
+
+        # hash value -> information about the archived entry
+        self._entries = {}
+
+        # Changes since the manifest was loaded, used to merge with changes made by other machines sharing the archive
+        self._added_entries = {}
+        self._removed_hash_values = set()
+
+        self._load()
+
+    def __contains__(self, hash_value):
+        return hash_value in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def hash_values(self):
+        return list(self._entries.keys())
+
+    def get_entry(self, hash_value):
+        return self._entries.get(hash_value)
+
+    def add(self, hash_value, size, last_used=None, **location):
+        """
+        Records an archived entry
+        :param hash_value: hash value of the asset
+        :param size: size of the archived data in bytes
+        :param last_used: time the entry was last referenced, defaults to now
+        :param location: extra information about where the data is stored
+        """
+
+        if last_used is None:
+            last_used = time.time()
+
+        entry = {"size": size, "last_used": last_used}
+        entry.update(location)
+
+        self._entries[hash_value] = entry
+        self._added_entries[hash_value] = entry
+        self._removed_hash_values.discard(hash_value)
+
+    def touch(self, hash_values):
+        """
+        Marks the entries as referenced so they are the last ones to be evicted
+        """
+
+        now = time.time()
+        for each_hash_value in hash_values:
+            entry = self._entries.get(each_hash_value)
+            if entry:
+                entry["last_used"] = now
+                self._added_entries[each_hash_value] = entry
+
+    def get_total_size(self):
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def get_least_recently_used(self):
+        """
+        Returns the entries ordered from the least recently used to the most recently used
+        :return: list of hash value, last used time and size
+        """
+
+        entries = [(hash_value, entry.get("last_used", 0), entry["size"]) for hash_value, entry in self._entries.items()]
+
+        return sorted(entries, key=lambda each_entry: each_entry[1])
+
+    def remove(self, hash_value):
+        self._entries.pop(hash_value, None)
+        self._added_entries.pop(hash_value, None)
+        self._removed_hash_values.add(hash_value)
+
+    def _read_manifest_file(self):
+
+        with open(self.manifest_file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != self.MANIFEST_VERSION:
+            raise ValueError("Unsupported manifest version: %s" % data.get("version"))
+
+        return data["entries"]
+
+    def _load(self):
+
+        if self.manifest_file_path.exists():
+            try:
+                self._entries = self._read_manifest_file()
+                L.info("Loaded %s entries from the archive manifest", len(self._entries))
+                return
+            except (OSError, ValueError, KeyError):
+                L.warning("Unable to read the archive manifest at: %s, rebuilding it", self.manifest_file_path)
+
+        self._rebuild_from_archive_folder()
+
+    def _rebuild_from_archive_folder(self):
+        """
+        Archives created before the manifest existed are listed once to create the manifest
+        """
+
+        L.info("Building the archive manifest from: %s", self.archive_folder_path)
+
+        self._entries = {}
+        for each_file in self.archive_folder_path.glob("*.log"):
+            stat = each_file.stat()
+            self.add(each_file.stem, stat.st_size, stat.st_mtime)
+
+        self.save()
+
+    def save(self):
+        """
+        Merges the changes into the manifest on disk and replaces it in one go so readers never see a partial file
+        """
+
+        if not self.archive_folder_path.exists():
+            os.makedirs(self.archive_folder_path)
+
+        # Picking up entries that were archived by other machines since we loaded the manifest
+        if self.manifest_file_path.exists():
+            try:
+                entries = self._read_manifest_file()
+            except (OSError, ValueError, KeyError):
+                entries = {}
+
+            entries.update(self._added_entries)
+            for each_hash_value in self._removed_hash_values:
+                entries.pop(each_hash_value, None)
+
+            self._entries = entries
+
+        temp_path = self.manifest_file_path.with_name(self.manifest_file_path.name + "." + str(os.getpid()) + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.MANIFEST_VERSION, "entries": self._entries}, f)
+
+        os.replace(temp_path, self.manifest_file_path)
+
+        self._added_entries = {}
+        self._removed_hash_values = set()
@@ -0,0 +1,170 @@
+# coding=utf-8
+import logging
+import os
+import pathlib
+import sys
+
+from Editor import archivemanifest, fileutilities, packarchive
+
+L = logging.getLogger(__name__)
+
+# One log file per asset hash in the archive folder
+ARCHIVE_FORMAT_LOOSE = "loose"
+
+# Compressed append only pack files with an offset index
+ARCHIVE_FORMAT_PACK = "pack"
+
+ARCHIVE_FORMATS = [ARCHIVE_FORMAT_LOOSE, ARCHIVE_FORMAT_PACK]
+
+
+class LooseFileStore:
+    """
+    Stores every archived log as its own file named after the hash value, the manifest keeps track of the files
+    """
+
+    def __init__(self, archive_folder_path, link_mode=fileutilities.LINK_MODE_COPY):
+
+        self.archive_folder_path = pathlib.Path(archive_folder_path)
+        self.link_mode = link_mode
+
+        self.manifest = archivemanifest.ArchiveManifest(self.archive_folder_path)
+
+    def __contains__(self, hash_value):
+        return hash_value in self.manifest
+
+    def __len__(self):
+        return len(self.manifest)
+
+    def hash_values(self):
+        return self.manifest.hash_values()
+
+    def get_size(self, hash_value):
+        return self.manifest.get_entry(hash_value)["size"]
+
+    def get_total_size(self):
+        return self.manifest.get_total_size()
+
+    def get_least_recently_used(self):
+        return self.manifest.get_least_recently_used()
+
+    def get_file_path(self, hash_value):
+        return self.archive_folder_path.joinpath(hash_value + ".log")
+
+    def add_files(self, list_of_files):
+        """
+        Copies or links the files into the archive and records them in the manifest
+        :param list_of_files: log files named after the hash value of the asset
+        """
+
+        if not self.archive_folder_path.exists():
+            os.makedirs(self.archive_folder_path)
+
+        # The archive has to own its data, a symlink would point back into the work folder
+        link_mode = self.link_mode
+        if link_mode == fileutilities.LINK_MODE_SYMLINK:
+            link_mode = fileutilities.LINK_MODE_COPY
+
+        for source_file in list_of_files:
+            source_file = pathlib.Path(source_file)
+            target_file = self.get_file_path(source_file.stem)
+            fileutilities.link_or_copy_file(source_file, target_file, link_mode)
+
+            self.manifest.add(source_file.stem, target_file.stat().st_size)
+
+        self.manifest.save()
+
+    def add_data(self, records):
+        """
+        Writes data that is not in a file of its own into the archive
+        :param records: iterable of hash value and data
+        """
+
+        if not self.archive_folder_path.exists():
+            os.makedirs(self.archive_folder_path)
+
+        for hash_value, data in records:
+            target_file = self.get_file_path(hash_value)
+            temp_file = target_file.with_name(target_file.name + ".tmp")
+
+            with open(temp_file, "wb") as f:
+                f.write(data)
+            os.replace(temp_file, target_file)
+
+            self.manifest.add(hash_value, len(data))
+
+        self.manifest.save()
+
+    def read(self, hash_value):
+        with open(self.get_file_path(hash_value), "rb") as f:
+            return f.read()
+
+    def restore_files(self, hash_values, target_folder):
+        """
+        Makes the archived files available in the target folder, linking them when the link mode allows it
+        :return: hash values of the archived files that no longer exist
+        """
+
+        used_modes = {}
+        missing_hash_values = []
+        restored_hash_values = []
+        for each_hash_value in hash_values:
+            source_file = self.get_file_path(each_hash_value)
+            if source_file.exists():
+                target = pathlib.Path(target_folder).joinpath(source_file.name)
+                used_mode = fileutilities.link_or_copy_file(source_file, target, self.link_mode)
+                used_modes[used_mode] = used_modes.get(used_mode, 0) + 1
+                restored_hash_values.append(each_hash_value)
+            else:
+                L.error("Attempting to copy a cached file that does not exist!")
+                L.error("File name: %s", source_file)
+                missing_hash_values.append(each_hash_value)
+
+        self.manifest.touch(restored_hash_values)
+        self.manifest.save()
+
+        L.info("Restored files from the archive: %s", used_modes)
+
+        return missing_hash_values
+
+    def remove(self, hash_values):
+        """
+        Removes the entries from the manifest and deletes the files
+        """
+
+        for each_hash_value in hash_values:
+            self.manifest.remove(each_hash_value)
+
+            file_path = self.get_file_path(each_hash_value)
+            if file_path.exists():
+                os.remove(file_path)
+
+        self.manifest.save()
+
+    def should_compact(self):
+        """
+        Removed entries are deleted right away so there is never anything to compact
+        """
+
+        return False
+
+    def compact(self):
+        """
+        Loose files don't leave any unused data behind
+        """
+
+        L.info("Nothing to compact in a loose file archive")
+
+
+def create_archive_store(archive_folder_path, archive_format=ARCHIVE_FORMAT_LOOSE,
+                         link_mode=fileutilities.LINK_MODE_COPY):
+    """
+    Creates the store that holds the archived data
+    """
+
+    if archive_format == ARCHIVE_FORMAT_LOOSE:
+        return LooseFileStore(archive_folder_path, link_mode)
+    elif archive_format == ARCHIVE_FORMAT_PACK:
+        return packarchive.PackFileStore(archive_folder_path)
+
+    L.error("Archive format: %s is not valid, valid formats: %s", archive_format, ", ".join(ARCHIVE_FORMATS))
+    sys.exit(1)
@@ -0,0 +1,267 @@
+# coding=utf-8
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+
+L = logging.getLogger(__name__)
+
+DATABASE_FILE_NAME = "assets.db"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    hash TEXT NOT NULL,
+    unreal_file_name TEXT,
+    asset_path TEXT,
+    asset_type TEXT,
+    package_info TEXT,
+    source_key TEXT
+);
+CREATE INDEX IF NOT EXISTS packages_asset_type ON packages(asset_type);
+CREATE INDEX IF NOT EXISTS packages_asset_path ON packages(asset_path);
+CREATE INDEX IF NOT EXISTS packages_hash ON packages(hash);
+
+CREATE TABLE IF NOT EXISTS registry_tags (
+    package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value,
+    is_json INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS registry_tags_package ON registry_tags(package_id);
+CREATE INDEX IF NOT EXISTS registry_tags_key_value ON registry_tags(key, value);
+
+CREATE TABLE IF NOT EXISTS package_references (
+    package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    reference_key TEXT NOT NULL,
+    reference TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS package_references_package ON package_references(package_id);
+CREATE INDEX IF NOT EXISTS package_references_reference ON package_references(reference);
+
+CREATE TABLE IF NOT EXISTS dependencies (
+    package_id INTEGER NOT NULL REFERENCES packages(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    class_name TEXT,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS dependencies_package ON dependencies(package_id);
+CREATE INDEX IF NOT EXISTS dependencies_name ON dependencies(name);
+"""
+
+DEPENDENCY_KINDS = {"Imports": "Import", "Exports": "Export"}
+
+
+class AssetDatabase:
+    """
+    SQLite store for the extracted package data with a row per package and tables for the registry tags, the package
+    references and the import and export tables.  Writes are batched into transactions
+    """
+
+    def __init__(self, database_path):
+
+        self.database_path = pathlib.Path(database_path)
+
+        if not self.database_path.parent.exists():
+            os.makedirs(self.database_path.parent)
+
+        self.connection = sqlite3.connect(str(self.database_path))
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+
+        self._create_tables()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _create_tables(self):
+
+        schema_version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version not in (0, SCHEMA_VERSION):
+            L.warning("Asset database at: %s has schema version: %s, recreating it", self.database_path,
+                      schema_version)
+            with self.connection:
+                for each_table in ["dependencies", "package_references", "registry_tags", "packages"]:
+                    self.connection.execute("DROP TABLE IF EXISTS " + each_table)
+
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+
+    def get_source_keys(self):
+        """
+        :return: dict of package name to the key describing what the package data was created from
+        """
+
+        return dict((name, json.loads(source_key)) for name, source_key in
+                    self.connection.execute("SELECT name, source_key FROM packages"))
+
+    def get_package_names(self):
+        return [row[0] for row in self.connection.execute("SELECT name FROM packages")]
+
+    def upsert_packages(self, records):
+        """
+        Adds or replaces packages in a single transaction
+        :param records: iterable of package name, hash value, source key and the package data
+        """
+
+        with self.connection:
+            for name, hash_value, source_key, data in records:
+                self._upsert_package(name, hash_value, source_key, data)
+
+    def _upsert_package(self, name, hash_value, source_key, data):
+
+        self.connection.execute(
+            "INSERT INTO packages (name, hash, unreal_file_name, asset_path, asset_type, package_info, source_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET hash = excluded.hash, unreal_file_name = excluded.unreal_file_name, "
+            "asset_path = excluded.asset_path, asset_type = excluded.asset_type, "
+            "package_info = excluded.package_info, source_key = excluded.source_key",
+            (name, hash_value, data.get("UnrealFileName"), data.get("AssetPath"), data.get("AssetType"),
+             json.dumps(data.get("PackageInfo", {})), json.dumps(source_key)))
+
+        # lastrowid is not set when the row is updated
+        package_id = self.connection.execute("SELECT id FROM packages WHERE name = ?", (name,)).fetchone()[0]
+
+        for each_table in ["registry_tags", "package_references", "dependencies"]:
+            self.connection.execute("DELETE FROM " + each_table + " WHERE package_id = ?", (package_id,))
+
+        registry_rows = []
+        for key, value in data.get("AssetRegistry", {}).items():
+            if isinstance(value, (dict, list)):
+                registry_rows.append((package_id, key, json.dumps(value), 1))
+            else:
+                registry_rows.append((package_id, key, value, 0))
+
+        self.connection.executemany("INSERT INTO registry_tags (package_id, key, value, is_json) VALUES (?, ?, ?, ?)",
+                                    registry_rows)
+
+        self.connection.executemany(
+            "INSERT INTO package_references (package_id, reference_key, reference) VALUES (?, ?, ?)",
+            [(package_id, key, reference) for key, reference in data.get("PackageReferences", {}).items()])
+
+        dependency_rows = []
+        for field, kind in DEPENDENCY_KINDS.items():
+            for position, entry in enumerate(data.get(field, [])):
+                class_name = entry.get("ClassName", entry.get("Class"))
+                dependency_rows.append((package_id, kind, position, entry.get("Name"), class_name, json.dumps(entry)))
+
+        self.connection.executemany(
+            "INSERT INTO dependencies (package_id, kind, position, name, class_name, data) VALUES (?, ?, ?, ?, ?, ?)",
+            dependency_rows)
+
+    def remove_packages(self, names):
+        """
+        Removes the packages and everything stored for them in a single transaction
+        """
+
+        with self.connection:
+            self.connection.executemany("DELETE FROM packages WHERE name = ?", [(each,) for each in names])
+
+    def get_asset_types(self):
+        return [row[0] for row in
+                self.connection.execute("SELECT DISTINCT asset_type FROM packages ORDER BY asset_type")]
+
+    def get_registry_keys(self, asset_type=None):
+        """
+        :return: registry tag names in use, optionally only for one asset type
+        """
+
+        query = "SELECT DISTINCT registry_tags.key FROM registry_tags"
+        parameters = ()
+        if asset_type is not None:
+            query += " JOIN packages ON packages.id = registry_tags.package_id WHERE packages.asset_type = ?"
+            parameters = (asset_type,)
+
+        return [row[0] for row in self.connection.execute(query + " ORDER BY registry_tags.key", parameters)]
+
+    def get_packages(self, asset_type=None, path_prefix=None):
+        """
+        Looks up packages by type and path, the data has the same layout as the package json
+        :return: generator of the package data
+        """
+
+        query = "SELECT id, unreal_file_name, asset_path, asset_type, package_info FROM packages"
+        conditions = []
+        parameters = []
+
+        if asset_type is not None:
+            conditions.append("asset_type = ?")
+            parameters.append(asset_type)
+
+        if path_prefix:
+            # A range on the path keeps the lookup on the index
+            conditions.append("asset_path >= ? AND asset_path < ?")
+            parameters += [path_prefix, path_prefix + "\U0010ffff"]
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        for package_id, unreal_file_name, asset_path, asset_type, package_info in \
+                self.connection.execute(query + " ORDER BY asset_path", parameters).fetchall():
+            yield self._get_package_data(package_id, unreal_file_name, asset_path, asset_type, package_info)
+
+    def get_referencing_packages(self, reference):
+        """
+        :return: asset paths of the packages that reference a package
+        """
+
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT packages.asset_path FROM package_references "
+            "JOIN packages ON packages.id = package_references.package_id "
+            "WHERE package_references.reference = ? ORDER BY packages.asset_path", (reference,))]
+
+    def get_package_references(self):
+        """
+        Reads the references of every package with a single query
+        :return: dict of asset path to the package names it references
+        """
+
+        package_references = {}
+        for asset_path, reference in self.connection.execute(
+                "SELECT packages.asset_path, package_references.reference FROM packages "
+                "LEFT JOIN package_references ON packages.id = package_references.package_id "
+                "ORDER BY packages.id, package_references.rowid"):
+            references = package_references.setdefault(asset_path, [])
+            if reference is not None:
+                references.append(reference)
+
+        return package_references
+
+    def _get_package_data(self, package_id, unreal_file_name, asset_path, asset_type, package_info):
+
+        asset_registry = {}
+        for key, value, is_json in self.connection.execute(
+                "SELECT key, value, is_json FROM registry_tags WHERE package_id = ? ORDER BY rowid", (package_id,)):
+            asset_registry[key] = json.loads(value) if is_json else value
+
+        package_references = dict(self.connection.execute(
+            "SELECT reference_key, reference FROM package_references WHERE package_id = ? ORDER BY rowid",
+            (package_id,)))
+
+        data = {"UnrealFileName": unreal_file_name,
+                "AssetPath": asset_path,
+                "AssetType": asset_type,
+                "PackageInfo": json.loads(package_info),
+                "PackageReferences": package_references,
+                "AssetRegistry": asset_registry}
+
+        for field, kind in DEPENDENCY_KINDS.items():
+            data[field] = [json.loads(row[0]) for row in self.connection.execute(
+                "SELECT data FROM dependencies WHERE package_id = ? AND kind = ? ORDER BY position",
+                (package_id, kind))]
+
+        return data
@@ -0,0 +1,275 @@
+# coding=utf-8
+import array
+import json
+import logging
+
+L = logging.getLogger(__name__)
+
+# How a property value is stored
+VALUE_KIND_NUMBER = 0
+VALUE_KIND_STRING = 1
+VALUE_KIND_JSON = 2
+
+
+class StringTable:
+    """
+    Interned strings, every distinct string is stored once and referenced by its index
+    """
+
+    def __init__(self):
+        self._strings = []
+        self._string_ids = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+    def add(self, value):
+        """
+        :return: index of the string, the string is added if it is not in the table yet
+        """
+
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+
+        return string_id
+
+    def get(self, string_id):
+        return self._strings[string_id]
+
+    def get_id(self, value):
+        """
+        :return: index of the string or None if it is not in the table
+        """
+
+        return self._string_ids.get(value)
+
+
+class PropertyColumns:
+    """
+    Key value properties of every record stored as columns.  The properties of record i are the entries between
+    offsets[i] and offsets[i + 1], numbers are kept in a typed array and strings in the string table
+    """
+
+    def __init__(self, strings):
+
+        self.strings = strings
+
+        self.offsets = array.array("I", [0])
+        self.keys = array.array("I")
+        self.kinds = bytearray()
+        self.numbers = array.array("d")
+        self.string_values = array.array("I")
+
+    def append(self, properties):
+
+        for key, value in properties.items():
+            self.keys.append(self.strings.add(key))
+
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.kinds.append(VALUE_KIND_NUMBER)
+                self.numbers.append(value)
+                self.string_values.append(0)
+
+            elif isinstance(value, str):
+                self.kinds.append(VALUE_KIND_STRING)
+                self.numbers.append(0.0)
+                self.string_values.append(self.strings.add(value))
+
+            else:
+                # Nested values like the asset import data are rare, they are kept as json text
+                self.kinds.append(VALUE_KIND_JSON)
+                self.numbers.append(0.0)
+                self.string_values.append(self.strings.add(json.dumps(value)))
+
+        self.offsets.append(len(self.keys))
+
+    def _get_value(self, position):
+
+        kind = self.kinds[position]
+        if kind == VALUE_KIND_NUMBER:
+            return self.numbers[position]
+
+        if kind == VALUE_KIND_STRING:
+            return self.strings.get(self.string_values[position])
+
+        return json.loads(self.strings.get(self.string_values[position]))
+
+    def get_properties(self, record_index):
+        """
+        :return: dict of the properties of a record
+        """
+
+        return dict((self.strings.get(self.keys[position]), self._get_value(position))
+                    for position in range(self.offsets[record_index], self.offsets[record_index + 1]))
+
+    def get_value(self, record_index, key, default=None):
+
+        key_id = self.strings.get_id(key)
+        if key_id is None:
+            return default
+
+        for position in range(self.offsets[record_index], self.offsets[record_index + 1]):
+            if self.keys[position] == key_id:
+                return self._get_value(position)
+
+        return default
+
+    def get_numeric_column(self, key):
+        """
+        Numeric values of a property for analytics, records without a numeric value for the key are skipped
+        :return: typed arrays of the record indexes and the values
+        """
+
+        record_indexes = array.array("I")
+        values = array.array("d")
+
+        key_id = self.strings.get_id(key)
+        if key_id is None:
+            return record_indexes, values
+
+        for record_index in range(len(self.offsets) - 1):
+            for position in range(self.offsets[record_index], self.offsets[record_index + 1]):
+                if self.keys[position] == key_id and self.kinds[position] == VALUE_KIND_NUMBER:
+                    record_indexes.append(record_index)
+                    values.append(self.numbers[position])
+                    break
+
+        return record_indexes, values
+
+    def get_key_names(self):
+        return sorted(set(self.strings.get(each) for each in set(self.keys)))
+
+
+class AssetRecord:
+    """
+    View of a single record in an asset record table, the data stays in the columns of the table
+    """
+
+    __slots__ = ("_table", "index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self.index = index
+
+    @property
+    def unreal_file_name(self):
+        return self._table.strings.get(self._table.unreal_file_names[self.index])
+
+    @property
+    def asset_path(self):
+        return self._table.strings.get(self._table.asset_paths[self.index])
+
+    @property
+    def asset_type(self):
+        return self._table.strings.get(self._table.asset_types[self.index])
+
+    @property
+    def package_info(self):
+        return self._table.package_info.get_properties(self.index)
+
+    @property
+    def asset_registry(self):
+        return self._table.asset_registry.get_properties(self.index)
+
+    @property
+    def package_references(self):
+        table = self._table
+        return [table.strings.get(each) for each in
+                table.references[table.reference_offsets[self.index]:table.reference_offsets[self.index + 1]]]
+
+    def get_registry_value(self, key, default=None):
+        return self._table.asset_registry.get_value(self.index, key, default)
+
+    def to_dict(self):
+        """
+        :return: the record in the same layout as the package json, the import and export tables are not kept
+        """
+
+        return {"UnrealFileName": self.unreal_file_name,
+                "AssetPath": self.asset_path,
+                "AssetType": self.asset_type,
+                "PackageInfo": self.package_info,
+                "PackageReferences": dict((str(i), each) for i, each in enumerate(self.package_references)),
+                "AssetRegistry": self.asset_registry}
+
+
+class AssetRecordTable:
+    """
+    Compact in memory model of the package data of a whole project.  The records are stored as columns of string
+    table indexes and typed arrays instead of a dict per package so names that are repeated across the project are
+    only stored once
+    """
+
+    def __init__(self):
+
+        self.strings = StringTable()
+
+        self.unreal_file_names = array.array("I")
+        self.asset_paths = array.array("I")
+        self.asset_types = array.array("I")
+
+        self.reference_offsets = array.array("I", [0])
+        self.references = array.array("I")
+
+        self.package_info = PropertyColumns(self.strings)
+        self.asset_registry = PropertyColumns(self.strings)
+
+    def __len__(self):
+        return len(self.asset_paths)
+
+    def __getitem__(self, index):
+
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        return AssetRecord(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield AssetRecord(self, index)
+
+    @classmethod
+    def from_package_data(cls, package_data):
+        """
+        :param package_data: iterable of the package data in the package json layout
+        """
+
+        table = cls()
+        for each_data in package_data:
+            table.add(each_data)
+
+        L.info("Loaded %s asset records with %s distinct strings", len(table), len(table.strings))
+
+        return table
+
+    def add(self, data):
+        """
+        Adds the package data in the package json layout
+        :return: the added record
+        """
+
+        self.unreal_file_names.append(self.strings.add(data.get("UnrealFileName") or ""))
+        self.asset_paths.append(self.strings.add(data.get("AssetPath") or ""))
+        self.asset_types.append(self.strings.add(data.get("AssetType") or ""))
+
+        self.references.extend(self.strings.add(each) for each in data.get("PackageReferences", {}).values())
+        self.reference_offsets.append(len(self.references))
+
+        self.package_info.append(data.get("PackageInfo", {}))
+        self.asset_registry.append(data.get("AssetRegistry", {}))
+
+        return AssetRecord(self, len(self) - 1)
+
+    def get_asset_types(self):
+        return sorted(set(self.strings.get(each) for each in set(self.asset_types)))
+
+    def get_records_of_type(self, asset_type):
+
+        type_id = self.strings.get_id(asset_type)
+        if type_id is None:
+            return []
+
+        return [AssetRecord(self, index) for index, each in enumerate(self.asset_types) if each == type_id]
@@ -0,0 +1,248 @@
+# coding=utf-8
+import heapq
+import json
+import logging
+import math
+import os
+import pathlib
+
+L = logging.getLogger(__name__)
+
+# Unreal naming convention prefixes, used to guess the type of assets that have not been extracted yet
+ASSET_PREFIX_CATEGORIES = {
+    "ABP": "AnimBlueprint",
+    "AM": "Animation",
+    "AS": "Animation",
+    "BP": "Blueprint",
+    "DA": "DataAsset",
+    "DT": "DataTable",
+    "M": "Material",
+    "MF": "Material",
+    "MI": "MaterialInstance",
+    "NS": "Particle",
+    "P": "Particle",
+    "PS": "Particle",
+    "S": "Sound",
+    "SC": "Sound",
+    "SK": "SkeletalMesh",
+    "SM": "StaticMesh",
+    "T": "Texture",
+    "W": "Widget",
+    "WBP": "Widget",
+}
+
+MAP_CATEGORY = "Map"
+DEFAULT_CATEGORY = "Other"
+
+# Starting values before anything has been measured
+DEFAULT_STARTUP_SECONDS = 30.0
+
+# The fit can't tell the startup from the work when the chunks all look the same, the startup is never estimated
+# lower than this fraction of the default or the fastest chunk that was measured
+MIN_STARTUP_FRACTION = 0.25
+
+# Relative cost of each category, the measured times scale these
+SECONDS_PER_FILE = {MAP_CATEGORY: 2.0, "Blueprint": 0.2, "AnimBlueprint": 0.2, "Widget": 0.1}
+SECONDS_PER_FILE_OTHER = 0.05
+SECONDS_PER_MB = {MAP_CATEGORY: 0.1, "Texture": 0.01}
+SECONDS_PER_MB_OTHER = 0.02
+
+# Chunks should do this many times more work than the editor startup so the startup is amortized
+STARTUP_AMORTIZATION_FACTOR = 4.0
+
+# Weight of the older measurements, lets the model follow changes to the project and the machines
+MEASUREMENT_DECAY = 0.9
+
+
+def get_asset_category(file_path):
+    """
+    Guesses the type of the asset from the extension and the naming convention prefix
+    """
+
+    file_path = pathlib.Path(file_path)
+
+    if file_path.suffix.lower() == ".umap":
+        return MAP_CATEGORY
+
+    prefix = file_path.stem.split("_")[0].upper()
+
+    return ASSET_PREFIX_CATEGORIES.get(prefix, DEFAULT_CATEGORY)
+
+
+def get_base_file_cost(file_path):
+    """
+    Cost of a file from its category and size before the measured times are applied
+    """
+
+    category = get_asset_category(file_path)
+
+    try:
+        size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    except OSError:
+        size_mb = 0.0
+
+    return SECONDS_PER_FILE.get(category, SECONDS_PER_FILE_OTHER) + size_mb * SECONDS_PER_MB.get(category,
+                                                                                               SECONDS_PER_MB_OTHER)
+
+
+class ExtractionCostStats:
+    """
+    Small persistent model of how long the package info commandlet takes.  A chunk is predicted to take the editor
+    startup time plus the base cost of its files times a work scale.  Both are fitted to the measured chunk times with
+    a least squares fit where older measurements are decayed
+    """
+
+    STATS_VERSION = 1
+
+    def __init__(self, stats_file_path):
+
+        self.stats_file_path = pathlib.Path(stats_file_path)
+
+        self.startup_seconds = DEFAULT_STARTUP_SECONDS
+        self.work_scale = 1.0
+
+        # Fastest chunk that was measured, no chunk can take less than the startup
+        self.min_chunk_seconds = None
+
+        # Decayed sums of the base cost (x) and the measured time (y) of the chunks
+        self.sums = {"n": 0.0, "x": 0.0, "y": 0.0, "xx": 0.0, "xy": 0.0}
+
+        self._load()
+
+    def _load(self):
+
+        if not self.stats_file_path.exists():
+            return
+
+        try:
+            with open(self.stats_file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            if data.get("version") != self.STATS_VERSION:
+                return
+
+            startup_seconds, work_scale, sums = data["startup_seconds"], data["work_scale"], data["sums"]
+        except (OSError, ValueError, KeyError):
+            L.warning("Unable to read the extraction stats at: %s", self.stats_file_path)
+            return
+
+        self.startup_seconds = startup_seconds
+        self.work_scale = work_scale
+        self.sums = sums
+        self.min_chunk_seconds = data.get("min_chunk_seconds")
+
+    def save(self):
+
+        if not self.stats_file_path.parent.exists():
+            os.makedirs(self.stats_file_path.parent)
+
+        temp_path = self.stats_file_path.with_name(self.stats_file_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.STATS_VERSION,
+                       "startup_seconds": self.startup_seconds,
+                       "work_scale": self.work_scale,
+                       "sums": self.sums,
+                       "min_chunk_seconds": self.min_chunk_seconds}, f, indent=4)
+
+        os.replace(temp_path, self.stats_file_path)
+
+    def get_min_startup_seconds(self):
+        """
+        Lowest startup the fit is allowed to settle on, a startup of zero would plan a chunk per file
+        """
+
+        min_startup_seconds = DEFAULT_STARTUP_SECONDS * MIN_STARTUP_FRACTION
+        if self.min_chunk_seconds is not None:
+            min_startup_seconds = min(min_startup_seconds, self.min_chunk_seconds)
+
+        return min_startup_seconds
+
+    def predict_file_cost(self, file_path):
+        """
+        Predicted seconds the commandlet spends on the file, not including the editor startup
+        """
+
+        return get_base_file_cost(file_path) * self.work_scale
+
+    def record_chunk(self, files, elapsed_seconds):
+        """
+        Refits the model with the measured time of a chunk
+        """
+
+        base_cost = sum(get_base_file_cost(each_file) for each_file in files)
+        predicted_seconds = self.startup_seconds + base_cost * self.work_scale
+
+        sums = self.sums
+        for key in sums:
+            sums[key] *= MEASUREMENT_DECAY
+
+        sums["n"] += 1.0
+        sums["x"] += base_cost
+        sums["y"] += elapsed_seconds
+        sums["xx"] += base_cost * base_cost
+        sums["xy"] += base_cost * elapsed_seconds
+
+        # Balanced chunks all have about the same base cost, then only the startup can be fitted
+        variance = sums["n"] * sums["xx"] - sums["x"] * sums["x"]
+        if sums["n"] >= 2 and variance > 1e-6 * sums["n"] * sums["xx"]:
+            work_scale = (sums["n"] * sums["xy"] - sums["x"] * sums["y"]) / variance
+            if work_scale > 0:
+                self.work_scale = work_scale
+
+        if self.min_chunk_seconds is None or elapsed_seconds < self.min_chunk_seconds:
+            self.min_chunk_seconds = elapsed_seconds
+
+        self.startup_seconds = max((sums["y"] - self.work_scale * sums["x"]) / sums["n"],
+                                   self.get_min_startup_seconds())
+
+        L.debug("Chunk of %s files took %.1fs, predicted %.1fs", len(files), elapsed_seconds, predicted_seconds)
+
+
+def plan_chunks(list_of_files, stats, worker_count=1, max_files_per_chunk=100):
+    """
+    Splits the files into chunks with about the same predicted cost.  The number of chunks is picked so that the
+    work in each chunk amortizes the editor startup, it is a multiple of the worker count so parallel runs finish
+    together and no chunk has more files than the commandlet can take
+    :return: list of chunks, the most expensive chunks first
+    """
+
+    if not list_of_files:
+        return []
+
+    file_costs = [(stats.predict_file_cost(each_file), each_file) for each_file in list_of_files]
+    total_cost = sum(cost for cost, _ in file_costs)
+
+    # Stats saved before the startup was floored can still have a startup of zero
+    startup_seconds = max(stats.startup_seconds, stats.get_min_startup_seconds())
+    target_chunk_cost = startup_seconds * STARTUP_AMORTIZATION_FACTOR
+
+    min_number_of_chunks = int(math.ceil(len(list_of_files) / float(max_files_per_chunk)))
+    number_of_chunks = max(int(math.ceil(total_cost / target_chunk_cost)), min_number_of_chunks, 1)
+
+    # Rounding up to fill every worker on the last round, as long as every chunk still does more work than the startup
+    max_number_of_chunks = max(int(total_cost / startup_seconds), min_number_of_chunks, 1)
+    rounded_number_of_chunks = int(math.ceil(number_of_chunks / float(worker_count))) * worker_count
+    number_of_chunks = max(min(rounded_number_of_chunks, max_number_of_chunks), number_of_chunks)
+    number_of_chunks = min(number_of_chunks, len(list_of_files))
+
+    # Longest processing time first, the most expensive file goes into the cheapest chunk that still has room
+    chunks = [[] for _ in range(number_of_chunks)]
+    chunk_heap = [(0.0, i) for i in range(number_of_chunks)]
+    full_chunks = []
+
+    for cost, each_file in sorted(file_costs, key=lambda each: each[0], reverse=True):
+        chunk_cost, chunk_index = heapq.heappop(chunk_heap)
+        chunks[chunk_index].append(each_file)
+
+        if len(chunks[chunk_index]) < max_files_per_chunk:
+            heapq.heappush(chunk_heap, (chunk_cost + cost, chunk_index))
+        else:
+            full_chunks.append((chunk_cost + cost, chunk_index))
+
+    chunk_costs = dict((chunk_index, chunk_cost) for chunk_cost, chunk_index in chunk_heap + full_chunks)
+    chunk_order = sorted(chunk_costs, key=lambda chunk_index: chunk_costs[chunk_index], reverse=True)
+
+    L.info("Planned %s chunks for %s files, predicted %.0fs of work, %.0fs startup per chunk",
+           number_of_chunks, len(list_of_files), total_cost, startup_seconds)
+
+    return [chunks[chunk_index] for chunk_index in chunk_order]
@@ -113,6 +113,12 @@ class BaseUE4Commandlet:
 
     def _get_file_list_as_strings(self):
 
+        file_list_flag = self.get_file_list_flag()
+        if file_list_flag:
+            # The paths go into a list file so the number of files is not limited by the max command line length
+            file_list_path = self._write_file_list()
+            return "-" + file_list_flag + "=\"" + file_list_path.as_posix() + "\""
+
         path_string = ""
         for each_file_to_extract in self.files:
 
@@ -120,6 +126,33 @@ class BaseUE4Commandlet:
 
         return path_string
 
+    def get_file_list_flag(self):
+        """
+        Name of the flag the commandlet reads its list file from, when the setting is missing the files are passed
+        on the command line
+        """
+
+        return self.commandlet_settings.get("file_list_flag", "")
+
+    def _write_file_list(self):
+        """
+        Writes the files to process into a text file next to the log, one path per line
+        :return: path to the list file
+        """
+
+        file_list_path = self.raw_log_path.joinpath(pathlib.Path(self.log_file_name).stem + "_file_list.txt")
+
+        if not file_list_path.parent.exists():
+            os.makedirs(file_list_path.parent)
+
+        with open(file_list_path, "w", encoding="utf-8") as f:
+            for each_file in self.files:
+                f.write(str(each_file) + "\n")
+
+        L.debug("Wrote %s files to: %s", len(self.files), file_list_path)
+
+        return file_list_path
+
     def get_commandlet_flags(self):
 
         """
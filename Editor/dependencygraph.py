@@ -0,0 +1,235 @@
+# coding=utf-8
+import array
+import logging
+import os
+import pathlib
+import struct
+import sys
+
+L = logging.getLogger(__name__)
+
+DEPENDENCY_GRAPH_FILE_NAME = "dependency_graph.bin"
+
+GRAPH_FILE_MAGIC = b"SDEP"
+GRAPH_FILE_VERSION = 1
+
+# magic, version, number of nodes, number of edges, size of the name table in bytes
+GRAPH_FILE_HEADER = struct.Struct("<4sIIII")
+
+# Node names are stored as a single utf-8 blob separated by this byte
+NAME_SEPARATOR = b"\0"
+
+
+def get_package_name(asset_path):
+    """
+    Converts the path of an asset to the package name the engine uses in the package references
+    :return: package name like /Game/Folder/Asset, package and object paths are accepted as well
+    """
+
+    path = asset_path.replace("\\", "/")
+
+    if "/Content/" in path:
+        path = "/Game/" + path.split("/Content/", 1)[1]
+
+    # Drops the extension or the object name
+    folder, _, file_name = path.rpartition("/")
+    return folder + "/" + file_name.split(".", 1)[0]
+
+
+def _new_index_array(size=0):
+    index_array = array.array("I")
+    if size:
+        index_array.frombytes(bytes(size * index_array.itemsize))
+
+    return index_array
+
+
+class DependencyGraph:
+    """
+    Package dependency graph with integer node ids.  The edges are stored in compressed sparse row arrays, the edges
+    of node i are edges[offsets[i]:offsets[i + 1]].  The reverse edges are stored the same way so the packages that
+    depend on an asset are found without going through every package
+    """
+
+    def __init__(self, names, forward_offsets, forward_edges, reverse_offsets, reverse_edges):
+
+        self.names = names
+
+        self.forward_offsets = forward_offsets
+        self.forward_edges = forward_edges
+        self.reverse_offsets = reverse_offsets
+        self.reverse_edges = reverse_edges
+
+        self._node_ids = dict((name, node_id) for node_id, name in enumerate(names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._node_ids
+
+    @property
+    def edge_count(self):
+        return len(self.forward_edges)
+
+    @classmethod
+    def from_references(cls, package_references):
+        """
+        Builds the graph from the references of each package
+        :param package_references: dict of package name to the names of the packages it references
+        """
+
+        names = set(package_references.keys())
+        for references in package_references.values():
+            names.update(references)
+
+        names = sorted(names)
+        node_ids = dict((name, node_id) for node_id, name in enumerate(names))
+
+        forward_offsets = _new_index_array(len(names) + 1)
+        forward_edges = _new_index_array()
+        in_degrees = _new_index_array(len(names))
+
+        for node_id, name in enumerate(names):
+            targets = sorted(set(node_ids[each] for each in package_references.get(name, [])) - {node_id})
+
+            forward_edges.extend(targets)
+            forward_offsets[node_id + 1] = len(forward_edges)
+
+            for each_target in targets:
+                in_degrees[each_target] += 1
+
+        reverse_offsets = _new_index_array(len(names) + 1)
+        for node_id, in_degree in enumerate(in_degrees):
+            reverse_offsets[node_id + 1] = reverse_offsets[node_id] + in_degree
+
+        # Going through the sources in order keeps the reverse edges of each node sorted
+        reverse_edges = _new_index_array(len(forward_edges))
+        insert_positions = reverse_offsets[:-1]
+        for node_id in range(len(names)):
+            for each_target in forward_edges[forward_offsets[node_id]:forward_offsets[node_id + 1]]:
+                reverse_edges[insert_positions[each_target]] = node_id
+                insert_positions[each_target] += 1
+
+        return cls(names, forward_offsets, forward_edges, reverse_offsets, reverse_edges)
+
+    def get_node_id(self, name):
+        return self._node_ids.get(name)
+
+    def get_dependencies(self, name, max_depth=None):
+        """
+        :return: names of the packages the package references directly and indirectly, closest first
+        """
+
+        return self._walk(name, self.forward_offsets, self.forward_edges, max_depth)
+
+    def get_dependents(self, name, max_depth=None):
+        """
+        :return: names of the packages that reference the package directly and indirectly, closest first
+        """
+
+        return self._walk(name, self.reverse_offsets, self.reverse_edges, max_depth)
+
+    def _walk(self, name, offsets, edges, max_depth):
+        """
+        Breadth first walk from a node
+        :param max_depth: number of levels to follow, everything that can be reached when not set
+        """
+
+        start_node_id = self._node_ids[name]
+
+        visited = bytearray(len(self.names))
+        visited[start_node_id] = 1
+
+        reached = []
+        frontier = [start_node_id]
+        depth = 0
+
+        while frontier and (not max_depth or depth < max_depth):
+            depth += 1
+
+            next_frontier = []
+            for each_node_id in frontier:
+                for each_target in edges[offsets[each_node_id]:offsets[each_node_id + 1]]:
+                    if not visited[each_target]:
+                        visited[each_target] = 1
+                        next_frontier.append(each_target)
+
+            reached.extend(next_frontier)
+            frontier = next_frontier
+
+        return [self.names[node_id] for node_id in reached]
+
+    def save(self, graph_file_path):
+
+        graph_file_path = pathlib.Path(graph_file_path)
+        if not graph_file_path.parent.exists():
+            os.makedirs(graph_file_path.parent)
+
+        name_table = NAME_SEPARATOR.join(each.encode("utf-8") for each in self.names)
+
+        temp_path = graph_file_path.with_name(graph_file_path.name + ".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(GRAPH_FILE_HEADER.pack(GRAPH_FILE_MAGIC, GRAPH_FILE_VERSION, len(self.names),
+                                           len(self.forward_edges), len(name_table)))
+            f.write(name_table)
+
+            for each_array in [self.forward_offsets, self.forward_edges, self.reverse_offsets, self.reverse_edges]:
+                # The file is always little endian
+                if sys.byteorder == "big":
+                    each_array = array.array(each_array.typecode, each_array)
+                    each_array.byteswap()
+
+                f.write(each_array.tobytes())
+
+        os.replace(temp_path, graph_file_path)
+
+    @classmethod
+    def load(cls, graph_file_path):
+        """
+        :return: the saved graph or None if there is no valid graph at the path
+        """
+
+        try:
+            with open(graph_file_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) < GRAPH_FILE_HEADER.size:
+            return None
+
+        magic, version, node_count, edge_count, name_table_size = GRAPH_FILE_HEADER.unpack_from(data)
+        if magic != GRAPH_FILE_MAGIC or version != GRAPH_FILE_VERSION:
+            L.warning("Dependency graph at: %s is from another version, it needs to be rebuilt", graph_file_path)
+            return None
+
+        item_size = _new_index_array().itemsize
+        expected_size = GRAPH_FILE_HEADER.size + name_table_size + (node_count + 1 + edge_count) * 2 * item_size
+        if len(data) != expected_size:
+            L.warning("Dependency graph at: %s is corrupt, it needs to be rebuilt", graph_file_path)
+            return None
+
+        position = GRAPH_FILE_HEADER.size
+        name_table = data[position:position + name_table_size]
+        position += name_table_size
+
+        names = [each.decode("utf-8") for each in name_table.split(NAME_SEPARATOR)] if node_count else []
+
+        arrays = []
+        for each_size in [node_count + 1, edge_count, node_count + 1, edge_count]:
+            each_array = _new_index_array()
+            byte_count = each_size * each_array.itemsize
+            each_array.frombytes(data[position:position + byte_count])
+            position += byte_count
+
+            if sys.byteorder == "big":
+                each_array.byteswap()
+
+            arrays.append(each_array)
+
+        if len(names) != node_count:
+            L.warning("Dependency graph at: %s is corrupt, it needs to be rebuilt", graph_file_path)
+            return None
+
+        return cls(names, *arrays)
@@ -0,0 +1,73 @@
+# coding=utf-8
+import hashlib
+import logging
+import mmap
+import os
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+L = logging.getLogger(__name__)
+
+# md5 is the algorithm that existing caches were created with
+DEFAULT_HASH_ALGORITHM = "md5"
+
+# Size of each read when hashing, large reads keep the number of syscalls down on big packages
+DEFAULT_READ_BUFFER_SIZE = 1024 * 1024
+
+
+def _get_hash_constructors():
+    """
+    Returns the available hash algorithms, xxhash is only available if the package is installed
+    """
+
+    constructors = {
+        "md5": hashlib.md5,
+        "sha1": hashlib.sha1,
+        "blake2b": lambda: hashlib.blake2b(digest_size=16),
+    }
+
+    if xxhash:
+        constructors["xxh64"] = xxhash.xxh64
+        constructors["xxh3_128"] = xxhash.xxh3_128
+
+    return constructors
+
+
+HASH_CONSTRUCTORS = _get_hash_constructors()
+
+
+def get_available_hash_algorithms():
+    return list(HASH_CONSTRUCTORS.keys())
+
+
+def is_hash_algorithm_available(algorithm):
+    return algorithm in HASH_CONSTRUCTORS
+
+
+def get_file_hash(file_path, algorithm=DEFAULT_HASH_ALGORITHM, use_mmap=False,
+                  buffer_size=DEFAULT_READ_BUFFER_SIZE):
+    """
+    Reads a file and generates a hash value for it
+    :param file_path: path to the file
+    :param algorithm: name of the hash algorithm
+    :param use_mmap: maps the file into memory instead of reading it in chunks
+    :param buffer_size: size of each read when not using mmap
+    :return: hex digest of the file
+    """
+
+    hasher = HASH_CONSTRUCTORS[algorithm]()
+
+    with open(file_path, "rb") as f:
+
+        # Empty files can't be memory mapped
+        if use_mmap and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                hasher.update(mapped_file)
+        else:
+            for chunk in iter(lambda: f.read(buffer_size), b""):
+                hasher.update(chunk)
+
+    return hasher.hexdigest()
@@ -0,0 +1,120 @@
+# coding=utf-8
+import errno
+import filecmp
+import logging
+import os
+import pathlib
+import shutil
+import sys
+
+L = logging.getLogger(__name__)
+
+LINK_MODE_COPY = "copy"
+LINK_MODE_HARDLINK = "hardlink"
+LINK_MODE_REFLINK = "reflink"
+LINK_MODE_SYMLINK = "symlink"
+
+# Tries a reflink, then a hardlink and copies the file if neither is possible
+LINK_MODE_AUTO = "auto"
+
+LINK_MODES = [LINK_MODE_COPY, LINK_MODE_HARDLINK, LINK_MODE_REFLINK, LINK_MODE_SYMLINK, LINK_MODE_AUTO]
+
+# ioctl request that clones a file on copy on write file systems (btrfs, xfs) on linux
+_FICLONE = 0x40049409
+
+
+def _reflink(source, target):
+    """
+    Creates a copy on write clone of the source file, raises OSError if the file system does not support it
+    """
+
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on linux")
+
+    import fcntl
+
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), _FICLONE, source_file.fileno())
+        except OSError:
+            target_file.close()
+            os.remove(target)
+            raise
+
+
+def _is_same_file(source, target):
+    """
+    Checks if the target already holds the source, a link to it or a copy with the same content
+    """
+
+    if not target.exists():
+        return False
+
+    if target.is_symlink():
+        return pathlib.Path(os.readlink(target)) == source
+
+    source_stat = source.stat()
+    target_stat = target.stat()
+
+    # Hardlinks share the inode
+    if os.path.samestat(source_stat, target_stat):
+        return True
+
+    # A file with the same size can still be a stale or half written copy so the content has to match
+    return source_stat.st_size == target_stat.st_size and filecmp.cmp(source, target, shallow=False)
+
+
+def link_or_copy_file(source, target, link_mode=LINK_MODE_COPY):
+    """
+    Makes the source file available at the target path, either by linking it or by copying it.  Links fall back to
+    copying when the source and target are on different devices or the file system does not support the link
+    :return: the link mode that was used
+    """
+
+    source = pathlib.Path(source).absolute()
+    target = pathlib.Path(target)
+
+    if _is_same_file(source, target):
+        return "existing"
+
+    if not target.parent.exists():
+        os.makedirs(target.parent)
+
+    # Linking into a temp file and renaming it over the target so an existing target is replaced in one go
+    temp_target = target.with_name(target.name + ".linktmp")
+    if temp_target.exists() or temp_target.is_symlink():
+        os.remove(temp_target)
+
+    if link_mode == LINK_MODE_AUTO:
+        modes_to_try = [LINK_MODE_REFLINK, LINK_MODE_HARDLINK]
+    elif link_mode in [LINK_MODE_REFLINK, LINK_MODE_HARDLINK, LINK_MODE_SYMLINK]:
+        modes_to_try = [link_mode]
+    else:
+        modes_to_try = []
+
+    used_mode = LINK_MODE_COPY
+    for each_mode in modes_to_try:
+        try:
+            if each_mode == LINK_MODE_REFLINK:
+                _reflink(source, temp_target)
+            elif each_mode == LINK_MODE_HARDLINK:
+                os.link(source, temp_target)
+            else:
+                os.symlink(source, temp_target)
+
+            used_mode = each_mode
+            break
+
+        except (OSError, NotImplementedError) as e:
+            if getattr(e, "errno", None) == errno.EXDEV:
+                L.debug("%s and %s are on different devices, copying instead", source, target)
+                break
+
+            L.debug("Unable to %s %s: %s", each_mode, source, e)
+
+    if used_mode == LINK_MODE_COPY:
+        shutil.copy(source, temp_target)
+
+    os.replace(temp_target, target)
+
+    return used_mode
@@ -0,0 +1,113 @@
+# coding=utf-8
+import json
+import logging
+import os
+import pathlib
+
+L = logging.getLogger(__name__)
+
+
+class FileHashIndex:
+    """
+    Persistent index of file hash values keyed by the path and the stat information of the file.  Files are only
+    re-hashed if their size, modification time or inode changed since the index was saved
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, index_file_path, hash_algorithm="md5"):
+
+        self.index_file_path = pathlib.Path(index_file_path)
+        self.hash_algorithm = hash_algorithm
+
+        # path -> [size, mtime_ns, inode, hash value]
+        self._entries = {}
+        self._is_dirty = False
+
+        self._load()
+
+    @staticmethod
+    def get_stat_key(file_path):
+        """
+        Reads the values from disk that tell us if the file has changed
+        :return: list of size, modification time and inode
+        """
+
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def _load(self):
+
+        if not self.index_file_path.exists():
+            L.info("No hash index found at: %s", self.index_file_path)
+            return
+
+        try:
+            with open(self.index_file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            L.warning("Unable to read the hash index at: %s, starting a new one", self.index_file_path)
+            return
+
+        if data.get("version") != self.INDEX_VERSION:
+            L.info("Hash index version changed, starting a new one")
+            return
+
+        if data.get("hash_algorithm", "md5") != self.hash_algorithm:
+            L.info("Hash algorithm changed to %s, starting a new hash index", self.hash_algorithm)
+            self._is_dirty = True
+            return
+
+        self._entries = data["entries"]
+        L.info("Loaded %s entries from the hash index", len(self._entries))
+
+    def get_hash(self, file_path, stat_key):
+        """
+        Returns the indexed hash value for the file if the stat information still matches
+        :return: hash value or an empty string if the file needs to be hashed
+        """
+
+        entry = self._entries.get(str(file_path))
+
+        if entry and entry[:3] == stat_key:
+            return entry[3]
+
+        return ""
+
+    def set_hash(self, file_path, stat_key, hash_value):
+        self._entries[str(file_path)] = stat_key + [hash_value]
+        self._is_dirty = True
+
+    def prune(self, list_of_files):
+        """
+        Removes entries for files that are no longer part of the project
+        """
+
+        files_to_keep = set(str(each_file) for each_file in list_of_files)
+
+        for each_path in list(self._entries.keys()):
+            if each_path not in files_to_keep:
+                del self._entries[each_path]
+                self._is_dirty = True
+
+    def save(self):
+        """
+        Writes the index to disk, writes to a temp file first so a crash never leaves a half written index behind
+        """
+
+        if not self._is_dirty:
+            return
+
+        if not self.index_file_path.parent.exists():
+            os.makedirs(self.index_file_path.parent)
+
+        temp_path = self.index_file_path.with_name(self.index_file_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.INDEX_VERSION,
+                       "hash_algorithm": self.hash_algorithm,
+                       "entries": self._entries}, f)
+
+        os.replace(temp_path, self.index_file_path)
+        self._is_dirty = False
+
+        L.info("Saved %s entries to the hash index", len(self._entries))
@@ -1,47 +1,126 @@
-import hashlib
+import collections
+import concurrent.futures
 import io
 import json
 import logging
+import ntpath
 import os
 import pathlib
-import shutil
 import subprocess
+import sys
+import threading
+import time
 
 import ue4_constants
 import Editor.LogProcesser.packageinfolog as PackageInfoLog
-from Editor import commandlets, editorutilities
+from Editor import archivestores, assetdatabase, chunkplanner, commandlets, dependencygraph, \
+    editorutilities, filehashing, fileutilities, hashindex, packagereader, quarantine, remotecache, sectionindex
 
 
 L = logging.getLogger(__name__)
 
+# The package info output is split into a file per package
+SPLIT_MODE_FILES = "files"
+
+# The package info output is kept in one log per run with an index of the package sections
+SPLIT_MODE_INDEX = "index"
+
+SPLIT_MODES = [SPLIT_MODE_FILES, SPLIT_MODE_INDEX]
+
+# Packages are read by the package info commandlet or by reading the package files directly, the commandlet is then
+# only run on the packages the native reader does not support
+PACKAGE_READER_COMMANDLET = "commandlet"
+PACKAGE_READER_NATIVE = "native"
+
+PACKAGE_READERS = [PACKAGE_READER_COMMANDLET, PACKAGE_READER_NATIVE]
+
+# Max number of packages sent to a native reader worker process at a time
+NATIVE_READER_MAX_CHUNK_SIZE = 64
+
+# Max number of package logs sent to a json worker process at a time
+JSON_MAX_CHUNK_SIZE = 256
+
+# Number of packages written to the asset database in each transaction
+DATABASE_BATCH_SIZE = 500
+
+# The package data is written as a json file per package, into the asset database or both
+DATA_FORMAT_JSON = "json"
+DATA_FORMAT_SQLITE = "sqlite"
+DATA_FORMAT_BOTH = "both"
+
+DATA_FORMATS = [DATA_FORMAT_JSON, DATA_FORMAT_SQLITE, DATA_FORMAT_BOTH]
+
+# Line the editor prints once the commandlet has finished, the last package section is only complete when it follows
+# it.  The editor prints LogExit lines when it crashes as well so those don't mean the output is complete
+COMMANDLET_END_MARKER = "Execution of commandlet took"
+
+# Keeps track of what each json file was converted from, saved next to the json folder
+JSON_MANIFEST_FILE_NAME = "_json_manifest.json"
+
 
 class ProjectHashMap:
     """
-    Takes in a list of files and generates a unique has value from them
+    Takes in a list of files and generates a unique has value from them.  Files with identical contents share the
+    same hash value so each hash value maps to a list of files
     """
 
-    def __init__(self, list_of_files):
+    def __init__(self, list_of_files, worker_count=None, hash_index=None,
+                 hash_algorithm=filehashing.DEFAULT_HASH_ALGORITHM, use_mmap=False, prune=False):
 
         self.list_of_files = list_of_files
 
+        # Only set when the list is every file in the project, files that are not in the list are dropped from the
+        # index.  A mapping of a part of the project would otherwise throw away the hashes of every other file
+        self.prune = prune
+
+        self.hash_algorithm = hash_algorithm
+        self.use_mmap = use_mmap
+
+        # Optional persistent index so that files that have not changed on disk don't have to be hashed again
+        self.hash_index = hash_index
+
+        # Hashing is mostly disk bound and hashlib releases the GIL while digesting so a thread pool scales
+        # with both the cores and the disk bandwidth
+        if not worker_count:
+            worker_count = os.cpu_count() or 1
+        self.worker_count = worker_count
+
+        # hash value -> list of files with that content
         self.hash_value_mapping = {}
         self.hash_values_in_project = []
 
+        # Reverse lookup from the normalized file path to the hash value
+        self._filename_hash_mapping = {}
+
         self._generate_hash_for_files()
 
-    @staticmethod
-    def _get_file_hash(file_path):
+    def _get_file_hash(self, file_path):
         """
         Reads a file and generates a hash value for it
         :return:
         """
 
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
+        return filehashing.get_file_hash(file_path, self.hash_algorithm, self.use_mmap)
+
+    def _get_indexed_file_hash(self, file_path):
+        """
+        Returns the hash value from the index if the file has not changed, otherwise hashes the file
+        :return: hash value and if the file had to be hashed
+        """
+
+        if not self.hash_index:
+            return self._get_file_hash(file_path), True
+
+        stat_key = self.hash_index.get_stat_key(file_path)
+        hash_value = self.hash_index.get_hash(file_path, stat_key)
 
-        return hash_md5.hexdigest()
+        if hash_value:
+            return hash_value, False
+
+        hash_value = self._get_file_hash(file_path)
+        self.hash_index.set_hash(file_path, stat_key, hash_value)
+
+        return hash_value, True
 
     def _generate_hash_for_files(self):
         """
@@ -49,36 +128,80 @@ class ProjectHashMap:
         :return:
         """
 
-        for i, each_file in enumerate(self.list_of_files):
-            file_hash_value = self._get_file_hash(each_file)
+        L.info("Hashing %s files with %s using %s workers", len(self.list_of_files), self.hash_algorithm,
+               self.worker_count)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+            # map keeps the results in the same order as the input files
+            hash_values = executor.map(self._get_indexed_file_hash, self.list_of_files)
+
+            number_of_hashed_files = 0
+            for i, (each_file, (file_hash_value, was_hashed)) in enumerate(zip(self.list_of_files, hash_values)):
+
+                if was_hashed:
+                    number_of_hashed_files += 1
+
+                # Making a simple list of hash values in the project
+                self.hash_values_in_project.append(file_hash_value)
+
+                # Creating a mapping with the hash value and the file paths, byte identical files share a hash
+                self.hash_value_mapping.setdefault(file_hash_value, []).append(each_file)
+                self._filename_hash_mapping[self.normalize_path_key(each_file)] = file_hash_value
 
-            # Making a simple list of hash values in the project
-            self.hash_values_in_project.append(file_hash_value)
+                if i % 500 == 0:
+                    L.info("Generating Hash for %s out of %s", str(i), str(len(self.list_of_files)))
 
-            # Creating a mapping with the hash value and the file path
-            self.hash_value_mapping[file_hash_value] = each_file
+        L.info("Hashed %s files, %s were unchanged", number_of_hashed_files,
+               len(self.list_of_files) - number_of_hashed_files)
+        L.info("%s unique contents in %s files", len(self.hash_value_mapping), len(self.list_of_files))
 
-            if i % 500 == 0:
-                L.info("Generating Hash for %s out of %s", str(i), str(len(self.list_of_files)))
+        if self.hash_index:
+            if self.prune:
+                self.hash_index.prune(self.list_of_files)
+            self.hash_index.save()
+
+    @staticmethod
+    def normalize_path_key(file_path):
+        """
+        Paths are compared the way windows does, case insensitive and without caring about the separators
+        :return: normalized path string
+        """
+
+        return ntpath.normcase(ntpath.normpath(str(file_path)))
 
     def get_hash_from_filename(self, filename):
 
-        for each_hash in self.hash_value_mapping:
+        hash_value = self._filename_hash_mapping.get(self.normalize_path_key(filename))
 
-            if str(self.hash_value_mapping[each_hash]) == filename:
-                return each_hash
+        if hash_value:
+            return hash_value
 
         L.warning("Unable to find hash from filename!")
 
         return ""
 
     def get_filename_from_hash(self, hash_value):
+        """
+        Returns the first file with the hash value, it is the one used when extracting the content
+        """
+
+        if hash_value in self.hash_value_mapping:
+            return self.hash_value_mapping[hash_value][0]
 
-        if hash_value in self.hash_value_mapping.keys():
+        else:
+            L.error("Unable to find file for hash: %s", hash_value)
+
+    def get_filenames_from_hash(self, hash_value):
+        """
+        Returns all the files that share the hash value
+        """
+
+        if hash_value in self.hash_value_mapping:
             return self.hash_value_mapping[hash_value]
 
         else:
             L.error("Unable to find file for hash: %s", hash_value)
+            return []
 
 
 class ExtractedDataArchive:
@@ -87,34 +210,49 @@ class ExtractedDataArchive:
     Handles interacting with the archive both recovering data from there as well as updating it with new data
     """
 
-    def __init__(self, path_to_archive, file_hash_mappings):
+    # Holds information about how the archive was created
+    ARCHIVE_INFO_FILE_NAME = "_archive_info.json"
+
+    def __init__(self, path_to_archive, file_hash_mappings, hash_algorithm=filehashing.DEFAULT_HASH_ALGORITHM,
+                 link_mode=fileutilities.LINK_MODE_COPY, archive_format=archivestores.ARCHIVE_FORMAT_LOOSE,
+                 remote_cache=None):
         self.archive_folder_path = pathlib.Path(path_to_archive)
         self.project_hash_file_mappings = file_hash_mappings
+        self.hash_algorithm = hash_algorithm
 
-        self._hash_values_in_archive = self._get_hash_values_from_archive()
+        # Optional cache shared between machines, the local archive reads through it and writes to it
+        self.remote_cache = remote_cache
+
+        # Where and how the archived data is stored
+        self.store = archivestores.create_archive_store(self.archive_folder_path, archive_format, link_mode)
+        self._validate_hash_algorithm()
         self.missing_files = []
-        self.archived_files = []
+        self.archived_hash_values = []
 
     def get_missing_files(self):
         """
         """
 
+        if self.remote_cache:
+            # Filling the local archive with the entries other machines have already extracted
+            remotecache.fill_from_remote_cache(self.remote_cache, self.store, self.project_hash_file_mappings.keys())
+
         for each_hash in self.project_hash_file_mappings:
 
             if not self.is_hash_value_in_archive(each_hash):
-                missing_file = self.project_hash_file_mappings[each_hash]
+                # Files with the same content only need to be extracted once
+                missing_file = self.project_hash_file_mappings[each_hash][0]
                 self.missing_files.append(str(missing_file))
 
         return self.missing_files
 
-    def get_archived_files(self):
+    def get_archived_hash_values(self):
 
         for each_hash in self.project_hash_file_mappings:
             if self.is_hash_value_in_archive(each_hash):
-                hash_file_path = self.archive_folder_path.joinpath(each_hash + ".log")
-                self.archived_files.append(hash_file_path)
+                self.archived_hash_values.append(each_hash)
 
-        return self.archived_files
+        return self.archived_hash_values
 
     def is_hash_value_in_archive(self, value):
         """
@@ -123,30 +261,113 @@ class ExtractedDataArchive:
         :return:
         """
 
-        if value in self._hash_values_in_archive:
+        if value in self.store:
             return True
         else:
             return False
 
-    def _get_hash_values_from_archive(self):
+    def archive_files(self, list_of_files):
         """
-        search through the archive to look for folder names with hash values
-        :return:
+        Stores the files in the archive
+        :param list_of_files: log files named after the hash value of the asset
+        """
+
+        self.store.add_files(list_of_files)
+        L.info("Archived %s files", len(list_of_files))
+
+        if self.remote_cache:
+            remotecache.push_to_remote_cache(self.remote_cache, [pathlib.Path(each).stem for each in list_of_files],
+                                             self.store.read)
+
+    def archive_sections(self, section_index):
+        """
+        Stores the package sections of an indexed log in the archive
+        """
+
+        self.store.add_data(section_index.read_sections())
+        L.info("Archived %s sections from: %s", len(section_index), section_index.log_path)
+
+        if self.remote_cache:
+            remotecache.push_to_remote_cache(self.remote_cache, section_index.hash_values(), self.store.read)
+
+    def restore_files(self, hash_values, target_folder):
+        """
+        Makes the archived data for the hash values available in the target folder
+        :return: hash values that could not be restored
+        """
+
+        return self.store.restore_files(hash_values, target_folder)
+
+    def remove_hash_values(self, hash_values):
+        """
+        Removes entries from the archive, used when an archived file has gone missing so it gets extracted again
+        """
+
+        self.store.remove(hash_values)
+
+    def compact(self):
+        self.store.compact()
+
+    def collect_garbage(self, max_size_bytes=0, max_age_days=0):
+        """
+        Evicts the least recently used entries until the archive is below the size cap and removes entries that
+        have not been used for longer than the max age
+        :param max_size_bytes: size cap of the archive, 0 for no cap
+        :param max_age_days: entries not used for this many days are removed, 0 to keep them
+        :return: hash values that were removed
+        """
+
+        total_size = self.store.get_total_size()
+        oldest_allowed_time = time.time() - max_age_days * 24 * 60 * 60
+
+        hash_values_to_remove = []
+        for hash_value, last_used, size in self.store.get_least_recently_used():
+            is_over_size = max_size_bytes and total_size > max_size_bytes
+            is_too_old = max_age_days and last_used < oldest_allowed_time
+
+            if not is_over_size and not is_too_old:
+                # Everything after this entry was used more recently
+                break
+
+            hash_values_to_remove.append(hash_value)
+            total_size -= size
+
+        L.info("Evicting %s entries from the archive, %s bytes remaining", len(hash_values_to_remove), total_size)
+
+        if hash_values_to_remove:
+            self.store.remove(hash_values_to_remove)
+
+            # Removed entries only take up space, the pack is rewritten once enough of it is removed data
+            if self.store.should_compact():
+                self.store.compact()
+
+        return hash_values_to_remove
+
+    def _validate_hash_algorithm(self):
+        """
+        Makes sure that the archive was created with the same hash algorithm as the project hash values, hash values
+        from different algorithms can't be compared
         """
 
-        # TODO make it so that this can be somewhat cached but make sure that we can refresh if we know
-        # That the contents of the folder has changed
+        archive_info_path = self.archive_folder_path.joinpath(self.ARCHIVE_INFO_FILE_NAME)
 
-        hash_values = []
-        for each_file in self.archive_folder_path.glob("*"):
-            each_file: pathlib.Path = each_file
+        archive_hash_algorithm = ""
+        if archive_info_path.exists():
+            with open(archive_info_path, "r") as f:
+                archive_hash_algorithm = json.load(f)["hash_algorithm"]
+        elif len(self.store):
+            # Archives created before the algorithm was recorded always used md5
+            archive_hash_algorithm = filehashing.DEFAULT_HASH_ALGORITHM
 
-            name_split = each_file.name.split(".")
-            name_split.pop(-1)
-            hash_value = "".join(name_split)
-            hash_values.append(hash_value)
+        if archive_hash_algorithm and archive_hash_algorithm != self.hash_algorithm:
+            L.error("Archive at: %s was created with the %s hash algorithm but the project is using %s",
+                    self.archive_folder_path, archive_hash_algorithm, self.hash_algorithm)
+            L.error("Point the sentinel_cache_path to a different folder or change the hash_algorithm back")
+            sys.exit(1)
 
-        return hash_values
+        if not archive_info_path.exists():
+            with open(archive_info_path, "w") as f:
+                json.dump({"hash_algorithm": self.hash_algorithm}, f, indent=4)
 
 
 class BasePackageInspection:
@@ -161,9 +382,27 @@ class BasePackageInspection:
         self._construct_paths()
         self._editor_util = editorutilities.UE4EditorUtilities(run_config)
 
-        # Files that have been extracted
+        # Package files that have been extracted
         self.extracted_files = []
 
+        # Indexes of the package sections in the logs when the output is not split into files
+        self.section_indexes = []
+        self.hash_mapping = None
+
+        # Measured extraction times used to plan the chunks
+        self._extraction_stats = None
+        self._extraction_stats_lock = threading.Lock()
+
+        # Files that crash the editor
+        self._quarantine = None
+        self._quarantine_lock = threading.Lock()
+
+        # Set when the editor fails without outputting any packages, the chunks that have not started are skipped
+        self._editor_failed = threading.Event()
+
+        # A file the commandlet has output, used to check if the editor is able to run at all
+        self._known_good_file = None
+
     def _construct_paths(self):
         """Makes the paths for outputs inside of the root artifact folder"""
 
@@ -194,179 +433,567 @@ class BasePackageInspection:
         L.info("UE project has: %s files total", len(project_files))
 
         # hash mapping for the files in the project
-        hash_mapping = ProjectHashMap(project_files)
+        hash_mapping = create_project_hash_map(self._run_config, project_files, prune=True)
         L.info("Hash Mapping completed")
 
+        # Saving the mapping so that the later steps don't need to hash the project again
+        self.hash_mapping = hash_mapping
+
         # Compares the hash values with what has already been archived
         L.info("Searching archive")
-        archive_object = ExtractedDataArchive(self._archive_folder_path, hash_mapping.hash_value_mapping)
+        archive_object = create_extracted_data_archive(self._run_config, hash_mapping.hash_value_mapping,
+                                                       hash_mapping.hash_algorithm)
 
         # Return a list of the missing files
         L.info("Generate missing files list")
         missing_file_list = archive_object.get_missing_files()
 
         L.info("Generating list of files that already exist")
-        archived_files = archive_object.get_archived_files()
+        archived_hash_values = archive_object.get_archived_hash_values()
 
         L.info("Recover found files from archive")
-        self._copy_archived_files_to_work_folder(archived_files)
+        self._copy_archived_files_to_work_folder(archived_hash_values, archive_object)
+
+        # Skipping the files that are known to crash the editor
+        self._quarantine = quarantine.PackageQuarantine(get_quarantine_path(self._run_config))
+        self._quarantine.remove_unused(hash_mapping.hash_value_mapping)
+        if len(self._quarantine):
+            L.warning("Skipping %s quarantined files: %s", len(self._quarantine), self._quarantine.get_paths())
+            missing_file_list = [each_file for each_file in missing_file_list
+                                 if hash_mapping.get_hash_from_filename(each_file) not in self._quarantine]
 
         L.info("%s files need to be refresh", len(missing_file_list))
 
-        chunks_of_files_to_process = split_list_into_chunks(missing_file_list, 100)
+        if get_package_reader(self._run_config) == PACKAGE_READER_NATIVE:
+            missing_file_list = self._extract_natively(missing_file_list)
+            L.info("%s files need the package info commandlet", len(missing_file_list))
+
+        # Balancing the chunks based on how long similar files took to extract on earlier runs
+        self._extraction_stats = chunkplanner.ExtractionCostStats(get_extraction_stats_path(self._run_config))
+        chunks_of_files_to_process = chunkplanner.plan_chunks(missing_file_list,
+                                                              self._extraction_stats,
+                                                              get_package_info_worker_count(self._run_config),
+                                                              get_package_info_max_files_per_chunk(self._run_config))
 
         #  This is where we go through all the to be able to get information about paths and types
         L.info("Starting file extract")
         self._extract_from_files(chunks_of_files_to_process)
 
-    def _copy_archived_files_to_work_folder(self, archived_files):
+    def _copy_archived_files_to_work_folder(self, archived_hash_values, archive_object):
 
-        artifacts_path = pathlib.Path(self._run_config["environment"]["sentinel_artifacts_path"])
+        missing_hash_values = archive_object.restore_files(archived_hash_values, get_raw_packages_path(self._run_config))
 
-        for source_file in archived_files:
-            source_file = pathlib.Path(source_file)
-            if source_file.exists():
+        if missing_hash_values:
+            # Dropping the entries from the manifest so the files are extracted again on the next run
+            archive_object.remove_hash_values(missing_hash_values)
 
-                target = artifacts_path.joinpath("Raw", "Packages", source_file.name)
-                if not target.parent.exists():
+    def _extract_natively(self, list_of_files):
+        """
+        Reads the package files directly and writes the packages the same way as the commandlet output
+        :return: files the native reader does not support
+        """
 
-                    os.makedirs(target.parent)
-                shutil.copy(source_file, target)
-            else:
-                L.error("Attempting to copy a cached file that does not exist!")
-                L.error("File name: %s", source_file)
+        splitter = PackageSectionSplitter(get_raw_packages_path(self._run_config), self.hash_mapping)
+        unsupported_files = []
+
+        worker_count = min(get_json_worker_count(self._run_config), max(len(list_of_files), 1))
+        L.info("Reading %s packages with %s workers", len(list_of_files), worker_count)
+
+        def _collect(file_path, section_lines):
+            if section_lines is None:
+                unsupported_files.append(file_path)
+                return
+
+            for each_line in section_lines:
+                splitter.add_line(each_line)
+
+        if worker_count == 1:
+            for each_file in list_of_files:
+                _collect(each_file, _read_package_section(each_file))
+        else:
+            chunk_size = max(min(len(list_of_files) // (worker_count * 4), NATIVE_READER_MAX_CHUNK_SIZE), 1)
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=worker_count) as executor:
+                for each_file, section_lines in zip(list_of_files, executor.map(_read_package_section, list_of_files,
+                                                                                 chunksize=chunk_size)):
+                    _collect(each_file, section_lines)
+
+        splitter.finish()
+        self.extracted_files.extend(splitter.output_files)
+
+        L.info("Read %s packages natively, %s are not supported", len(splitter.output_files), len(unsupported_files))
+
+        return unsupported_files
 
     def _extract_from_files(self, chunks_of_files_to_process):
 
+        worker_count = min(get_package_info_worker_count(self._run_config), max(len(chunks_of_files_to_process), 1))
+        L.info("Running %s chunks with %s commandlets at a time", len(chunks_of_files_to_process), worker_count)
+
+        def _run_chunk(chunk_index):
+
+            L.info("Starting chunk %s out of %s ", chunk_index + 1, str(len(chunks_of_files_to_process)))
+
+            start_time = time.perf_counter()
+            runs = self._extract_chunk(chunks_of_files_to_process[chunk_index], chunk_index)
+            elapsed_seconds = time.perf_counter() - start_time
+
+            L.info("Finished chunk %s out of %s in %.1fs", chunk_index + 1, str(len(chunks_of_files_to_process)),
+                   elapsed_seconds)
+
+            # Re-runs after a crash or a run that stopped early would throw off the model of how long a chunk takes
+            if self._extraction_stats and len(runs) == 1 and runs[0].has_processed_all_files():
+                with self._extraction_stats_lock:
+                    self._extraction_stats.record_chunk(chunks_of_files_to_process[chunk_index], elapsed_seconds)
+
+            return runs
+
         # TODO deals the case where the user deletes files
-        for i, each_chunk in enumerate(chunks_of_files_to_process):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=worker_count) as executor:
+            # map returns the runs in the chunk order no matter which chunk finishes first
+            for runs in executor.map(_run_chunk, range(len(chunks_of_files_to_process))):
+                for each_run in runs:
+
+                    # Save the file paths
+                    self.extracted_files.extend(each_run.output_files)
+
+                    if each_run.section_index is not None:
+                        self.section_indexes.append(each_run.section_index)
+
+        if self._extraction_stats and chunks_of_files_to_process:
+            self._extraction_stats.save()
+
+        if self._quarantine is not None:
+            self._quarantine.save()
+
+    def _extract_chunk(self, files_in_chunk, chunk_index):
+        """
+        Runs the commandlet on the chunk.  Which files are done is decided by the output, not the exit code.  When the
+        editor stops before the end of the output the files without output are run again, a run of them that outputs
+        nothing is split in half until the file that stops the editor is found.  The section that was cut off is only
+        used as a hint for the first split, the editor often stops while loading a package before anything of it is
+        printed.  A single file that outputs nothing is quarantined when a file that is known to be good still
+        outputs on its own, otherwise the editor itself is failing and the extraction is stopped
+        :return: list of the commandlet runs of the chunk
+        """
 
-            package_info_run_object = PackageInfoCommandlet(self._run_config, each_chunk)
+        runs = []
+        attempt = 0
 
-            L.info("Starting chunk %s out of %s ", i + 1, str(len(chunks_of_files_to_process)))
+        # Files to run together and the file the editor is suspected to stop on
+        files_to_run = collections.deque([(files_in_chunk, None)])
 
-            # Runs the extract
+        # Files that output nothing on their own before any file was known to be good
+        deferred_files = set()
+
+        while files_to_run:
+            if self._editor_failed.is_set():
+                L.error("Skipping %s files until the next refresh, the editor is failing",
+                        sum(len(each_files) for each_files, _ in files_to_run))
+                break
+
+            run_files, suspected_file = files_to_run.popleft()
+
+            # Every run writes its own output and editor log so the commandlets can run side by side
+            run_index = chunk_index if attempt == 0 else "%s_%s" % (chunk_index, attempt)
+            attempt += 1
+
+            package_info_run_object = PackageInfoCommandlet(self._run_config, run_files, run_index, self.hash_mapping)
             package_info_run_object.run()
+            runs.append(package_info_run_object)
+
+            processed_files = package_info_run_object.get_processed_files()
+            remaining_files = [each_file for each_file in run_files
+                               if ProjectHashMap.normalize_path_key(os.path.abspath(each_file)) not in processed_files]
+
+            if len(remaining_files) < len(run_files):
+                self._known_good_file = next(each_file for each_file in run_files if each_file not in remaining_files)
 
-            # Save the file path
-            self.extracted_files.append(package_info_run_object.output_file)
+            if not remaining_files:
+                continue
+
+            if package_info_run_object.splitter.is_output_complete:
+                L.warning("The package info commandlet finished without outputting %s files: %s",
+                          len(remaining_files), remaining_files)
+                continue
+
+            L.warning("%s out of %s files have no package info output, exit code: %s", len(remaining_files),
+                      len(run_files), package_info_run_object.return_code)
+
+            if len(remaining_files) < len(run_files):
+                # The editor stopped on one of the files without output, the file that was cut off is the suspect
+                files_to_run.append((remaining_files, package_info_run_object.get_pending_file()))
+                continue
+
+            if len(run_files) > 1:
+                files_to_run.extend((each_files, None) for each_files in self._split_files(run_files, suspected_file))
+                continue
+
+            # A single file that outputs nothing, either the file stops the editor or the editor is not able to run
+            file_key = ProjectHashMap.normalize_path_key(os.path.abspath(run_files[0]))
+            known_good_file = self._known_good_file
+
+            if known_good_file is None:
+                if file_key not in deferred_files and files_to_run:
+                    # Running the other files first to find out if the editor is able to run at all
+                    deferred_files.add(file_key)
+                    files_to_run.append((run_files, None))
+                    continue
+
+                L.error("The package info commandlet did not output any packages, exit code: %s. Stopping the "
+                        "extraction", package_info_run_object.return_code)
+                self._editor_failed.set()
+                continue
+
+            if self._is_editor_working(known_good_file, "%s_check_%s" % (chunk_index, attempt)):
+                self._quarantine_file(run_files[0])
+            else:
+                L.error("The package info commandlet did not output: %s that was extracted before, exit code: %s. "
+                        "Stopping the extraction", known_good_file, package_info_run_object.return_code)
+                self._editor_failed.set()
+
+        return runs
+
+    @staticmethod
+    def _split_files(files, suspected_file=None):
+        """
+        Splits the files in two, the suspected file goes on its own when it is one of the files
+        :return: the two halves
+        """
+
+        if suspected_file:
+            suspected_key = ProjectHashMap.normalize_path_key(os.path.abspath(suspected_file))
+            other_files = [each_file for each_file in files
+                           if ProjectHashMap.normalize_path_key(os.path.abspath(each_file)) != suspected_key]
+
+            if len(other_files) < len(files):
+                return [[each_file for each_file in files if each_file not in other_files], other_files]
+
+        half = len(files) // 2
+        return [files[:half], files[half:]]
+
+    def _is_editor_working(self, known_good_file, run_index):
+        """
+        Runs the commandlet on a file that it has output before, the run is only a check so its output is not kept
+        :return: if the file was output again
+        """
+
+        check_run_object = PackageInfoCommandlet(self._run_config, [known_good_file], run_index, self.hash_mapping)
+        check_run_object.run()
+
+        return check_run_object.has_processed_all_files()
+
+    def _quarantine_file(self, file_path):
+
+        if self._quarantine is None:
+            L.error("Unable to extract: %s, the editor crashes on it", file_path)
+            return
+
+        hash_value = self.hash_mapping.get_hash_from_filename(file_path)
+
+        with self._quarantine_lock:
+            self._quarantine.add(hash_value, file_path)
+
+
+class PackageSectionSplitter:
+    """
+    Splits the package info output into one file per package while the lines come in.  A section starts at the
+    package summary line, the section is held in memory until the next one starts and is then written straight to
+    <hash value>.log in the output folder
+    """
+
+    def __init__(self, output_folder, hash_mapping):
+
+        self.output_folder = pathlib.Path(output_folder)
+        self.hash_mapping = hash_mapping
+
+        # Files written and the normalized asset paths they were written for
+        self.output_files = []
+        self.processed_files = set()
+
+        # Package name and asset path of the section that was cut off, set when the pending section is dropped
+        self.pending_package_name = ""
+        self.pending_asset_path = ""
+
+        # Set once the commandlet reports that it has finished
+        self.is_output_complete = False
+
+        self._section_lines = []
+
+    def add_line(self, line):
+
+        if sectionindex.is_start_of_package_summary(line):
+            self._write_section()
+            self._section_lines = [line]
+
+        elif self._is_end_of_commandlet_output(line):
+            self._write_section()
+            self.is_output_complete = True
+
+        elif self._section_lines:
+            self._section_lines.append(line)
+
+    def finish(self, keep_pending_section=True):
+        """
+        Writes the last section
+        :param keep_pending_section: False when the output comes from the commandlet.  A section that is not followed
+        by another section or the line the commandlet prints when it has finished was cut off, it is then dropped
+        """
+
+        if keep_pending_section:
+            self._write_section()
+
+        elif self._section_lines:
+            self.pending_package_name = self._get_package_name(self._section_lines[0])
+            self.pending_asset_path = self._get_asset_path(self._section_lines)
+
+            L.warning("The output of %s was cut off, dropping it", self.pending_package_name)
+
+        self._section_lines = []
+
+    def _write_section(self):
+
+        if not self._section_lines:
+            return
+
+        section_lines = self._section_lines
+        self._section_lines = []
+
+        asset_path = self._get_asset_path(section_lines)
+        if not asset_path:
+            L.error("Unable to find the filename in the section: %s", section_lines[0].strip())
+            return
+
+        hash_value = self.hash_mapping.get_hash_from_filename(asset_path)
+        if not hash_value:
+            L.error("Unable to find the hash value of: %s", asset_path)
+            return
+
+        self._store_section(hash_value, section_lines)
+        self.processed_files.add(ProjectHashMap.normalize_path_key(asset_path))
+
+    def _store_section(self, hash_value, section_lines):
+
+        if not self.output_folder.exists():
+            os.makedirs(self.output_folder, exist_ok=True)
+
+        out_path = self.output_folder.joinpath(hash_value + ".log")
+        temp_out_path = out_path.with_name(out_path.name + ".tmp")
+
+        with io.open(temp_out_path, "w", encoding='utf-8', errors="ignore") as out_log:
+            out_log.writelines(section_lines)
+
+        os.replace(temp_out_path, out_path)
+
+        self.output_files.append(out_path)
+
+    @staticmethod
+    def _get_asset_path(section_lines):
+
+        for each in section_lines:
+            if "Filename: " in each:
+                return os.path.abspath(each.split("Filename: ")[1].replace("\n", ""))
+
+        return ""
+
+    @staticmethod
+    def _get_package_name(summary_line):
+        return summary_line.split("Package '", 1)[-1].split("' Summary", 1)[0]
+
+    @staticmethod
+    def _is_end_of_commandlet_output(line):
+        return COMMANDLET_END_MARKER in line
+
+
+class IndexedSectionSplitter(PackageSectionSplitter):
+    """
+    Writes the package info output to a single log and indexes the offset and length of each package section instead
+    of writing a file per package
+    """
+
+    def __init__(self, log_path, hash_mapping):
+
+        super().__init__(pathlib.Path(log_path).parent, hash_mapping)
+
+        if not self.output_folder.exists():
+            os.makedirs(self.output_folder, exist_ok=True)
+
+        # Starting from an empty index, an index left by an earlier run would point into the old log
+        index_path = sectionindex.get_section_index_path(log_path)
+        if index_path.exists():
+            os.remove(index_path)
+
+        self.section_index = sectionindex.SectionIndex(log_path)
+
+        self._log = open(log_path, "wb")
+        self._offset = 0
+        self._section_start = 0
+
+    def add_line(self, line):
+
+        if sectionindex.is_start_of_package_summary(line):
+            self._write_section()
+            self._section_lines = [line]
+            self._section_start = self._offset
+
+        elif self._is_end_of_commandlet_output(line):
+            self._write_section()
+            self.is_output_complete = True
+
+        elif self._section_lines:
+            self._section_lines.append(line)
+
+        data = line.encode("utf-8", errors="ignore")
+        self._log.write(data)
+        self._offset += len(data)
+
+    def finish(self, keep_pending_section=True):
+
+        super().finish(keep_pending_section)
+
+        self._log.close()
+        self.section_index.save()
+
+    def _store_section(self, hash_value, section_lines):
+        self.section_index.add(hash_value, self._section_start, self._offset - self._section_start)
 
 
 class PackageInfoCommandlet(commandlets.BaseUE4Commandlet):
     """ Runs the package info commandlet """
-    def __init__(self, run_config, unreal_asset_file_paths):
+    def __init__(self, run_config, unreal_asset_file_paths, chunk_index=None, hash_mapping=None):
+
+        # Chunks running at the same time need their own editor log
+        log_file_name = ""
+        if chunk_index is not None:
+            log_file_name = "_PkgInfoCommandlet_" + str(chunk_index) + ".log"
+
         # Initializes the object
-        super().__init__(run_config, "_PkgInfoCommandlet", files=unreal_asset_file_paths)
+        super().__init__(run_config, "_PkgInfoCommandlet", log_file_name=log_file_name,
+                         files=unreal_asset_file_paths)
+
+        self.chunk_index = chunk_index
+
+        if not hash_mapping:
+            hash_mapping = create_project_hash_map(run_config, unreal_asset_file_paths)
 
-        self.temp_extract_dir = pathlib.Path(self.environment_config["sentinel_artifacts_path"]).joinpath("temp")
-        self.output_file = ""
+        self.section_index = None
+        if get_package_info_split_mode(run_config) == SPLIT_MODE_INDEX:
+            log_name = str(chunk_index if chunk_index is not None else 0) + "_package_info.log"
+            self.splitter = IndexedSectionSplitter(get_raw_logs_path(run_config).joinpath(log_name), hash_mapping)
+            self.section_index = self.splitter.section_index
+        else:
+            self.splitter = PackageSectionSplitter(get_raw_packages_path(run_config), hash_mapping)
+
+        self.output_files = []
+        self.return_code = None
 
     def run(self):
         """
-        Prepares and runs the Package info commandlet
-        :return: path to the log file
+        Runs the Package info commandlet and splits the output into a file per package as it comes in
+        :return: list of the package files, empty when the sections are indexed
         """
 
         commandlet_command = self.get_command()
 
-        name = "_raw_package_info.log"
-        path = pathlib.Path(self.temp_extract_dir, "0" + name)
+        popen = subprocess.Popen(commandlet_command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 encoding='utf-8', errors="ignore")
 
-        if not os.path.exists(self.temp_extract_dir):
-            os.makedirs(self.temp_extract_dir)
+        for line in popen.stdout:
+            self.splitter.add_line(line)
 
-        if path.exists():
-            number_of_files = len(os.listdir(self.temp_extract_dir))
-            path = pathlib.Path(self.temp_extract_dir, str(number_of_files) + name)
+        popen.stdout.close()
+        self.return_code = popen.wait()
 
-        L.info("Writing to: %s", path)
+        # Whether the output is complete is decided by the output itself, commandlets exit with an error code when
+        # an error is logged and some editor failures exit without one.  A section the editor did not get to the end
+        # of is dropped so that it is never archived
+        self.splitter.finish(keep_pending_section=False)
 
-        with open(path, "w", encoding='utf-8', errors="ignore") as temp_out:
-            subprocess.run(commandlet_command, stdout=temp_out, stderr=subprocess.STDOUT)
+        if self.return_code != 0 and not self.ignore_exitcode:
+            L.warning("Package info commandlet exited with: %s", self.return_code)
 
-        self.output_file = path
+        self.output_files = self.splitter.output_files
+        L.info("Split out %s packages", len(self.splitter.processed_files))
 
+        return self.output_files
 
-class RawLogSplitter:
-    def __init__(self, run_config, log_files):
-        self._run_config = run_config
-        self._log_files_list = log_files
+    def get_processed_files(self):
+        """
+        :return: set of the normalized paths of the files that have a section in the output
+        """
 
-        self._editor_util = editorutilities.UE4EditorUtilities(run_config)
-        self.hash_mapping = ProjectHashMap(self._editor_util.get_all_content_files())
+        return self.splitter.processed_files
 
-        self.output_files = []
+    def has_processed_all_files(self):
+        """
+        :return: if every file of the run made it into the output
+        """
+
+        processed_files = self.get_processed_files()
 
-    def _split_temp_log_into_raw_files(self, temp_log_path):
+        return all(ProjectHashMap.normalize_path_key(os.path.abspath(each_file)) in processed_files
+                   for each_file in self.files)
 
+    def get_pending_file(self):
         """
-        Split the temp file into smaller pieces in the raw folder
-        :param temp_log_path:
-        :return:
+        :return: the file the editor was working on when the output was cut off, None when no section was cut off
         """
 
-        out_log = None
+        if self.splitter.pending_asset_path:
+            return self.splitter.pending_asset_path
 
-        temp_file_path = pathlib.Path(self._run_config["environment"]["sentinel_artifacts_path"]).joinpath("_temp.log")
+        if self.splitter.pending_package_name:
+            for each_file in self.files:
+                if dependencygraph.get_package_name(os.path.abspath(each_file)) == self.splitter.pending_package_name:
+                    return os.path.abspath(each_file)
 
-        with io.open(temp_log_path, encoding='utf-8', errors="ignore") as infile:
+        return None
 
-            for i, line in enumerate(infile):
-                if self._is_start_of_package_summary(line):
 
-                    if not out_log:
+class RawLogSplitter:
+    """
+    Splits package info output that was saved to disk into a file per package
+    """
 
-                        # If we have never saved anything open a new file
-                        out_log = io.open(temp_file_path, "w", encoding='utf-8', errors="ignore")
-                        # Adding the path to the log so we can move it to the archive folder when we finish
+    def __init__(self, run_config, log_files, hash_mapping=None, index_only=False):
+        self._run_config = run_config
+        self._log_files_list = log_files
 
-                    else:
-                        # Closing the last file that was written into
-                        out_log.close()
-                        # Rename the file to the guid name
-                        self._move_temp_file(temp_file_path)
+        # Indexing the sections in place instead of writing a file per package
+        self._index_only = index_only
 
-                        # Opening an new file with a new path
-                        out_log = open(temp_file_path, "w")
-                        # Adding the path to the log so we can move it to the archive folder when we finish
-                if out_log:
-                    # Write the data into the logs
-                    try:
-                        out_log.write(line + "")
-                    except UnicodeEncodeError:
-                        L.warning("Unable to process line" + str(i))
+        self._editor_util = editorutilities.UE4EditorUtilities(run_config)
 
-        # Handles the last file
-        if out_log:
-            out_log.close()
-            self._move_temp_file(temp_file_path)
+        if hash_mapping:
+            # Reusing the mapping from the package inspection
+            self.hash_mapping = hash_mapping
+        else:
+            self.hash_mapping = create_project_hash_map(run_config, self._editor_util.get_all_content_files(),
+                                                        prune=True)
 
-    def _move_temp_file(self, temp_file):
+        self.output_files = []
+        self.section_indexes = []
 
-        # absolute path to the file
-        asset_path = get_asset_path_from_log_file(temp_file)
-        hash = self.hash_mapping.get_hash_from_filename(asset_path)
+    def _split_log_into_raw_files(self, log_path):
+        """
+        Split the log into smaller pieces in the raw folder
+        """
 
-        artifacts_path = pathlib.Path(self._run_config["environment"]["sentinel_artifacts_path"])
-        out_path = artifacts_path.joinpath("Raw", "Packages", hash + ".log")
+        splitter = PackageSectionSplitter(get_raw_packages_path(self._run_config), self.hash_mapping)
 
-        if not pathlib.Path(out_path.parent).exists():
-            os.makedirs(out_path.parent)
+        with io.open(log_path, encoding='utf-8', errors="ignore") as infile:
+            for line in infile:
+                splitter.add_line(line)
 
-        shutil.move(temp_file, out_path)
-        self.output_files.append(out_path)
+        splitter.finish()
+        self.output_files.extend(splitter.output_files)
 
     def run(self):
         for each_log_file in self._log_files_list:
-            self._split_temp_log_into_raw_files(each_log_file)
-
-    @staticmethod
-    def _is_start_of_package_summary(line):
-
-        if "Package '" and "' Summary" in line:
-            return True
-        else:
-            return False
+            if self._index_only:
+                self.section_indexes.append(sectionindex.build_section_index(each_log_file, self.hash_mapping))
+            else:
+                self._split_log_into_raw_files(each_log_file)
 
     @staticmethod
     def _get_asset_name_from_summary_line(line):
@@ -387,24 +1014,532 @@ class RawLogSplitter:
         return asset_name
 
 
-def convert_file_list_to_json(run_config):
-    """ Goes through a list of log files and converts them to json"""
+def _read_package_section(file_path):
+    """
+    Reads a package with the native reader, runs in the worker processes
+    :return: lines of the package section or None if the package needs the commandlet
+    """
+
+    try:
+        return packagereader.read_package_section(file_path)
+    except packagereader.UnsupportedPackageError as e:
+        L.debug("Unable to read %s without the editor: %s", file_path, e)
+        return None
+
+
+def convert_file_list_to_json(run_config, hash_mapping=None, section_indexes=None, incremental=True):
+    """
+    Goes through a list of log files and converts them to json.  If a hash mapping is passed in the data extracted
+    for a content hash is written out for every file that shares that content.  Depending on the package data format
+    the data goes into json files, the asset database or both
+    :param section_indexes: indexes of packages that are sections of a larger log
+    :param incremental: only converts logs whose json is missing or was written for other content, a different
+    package path or an older parser.  Json for content that is no longer in the logs is removed
+    :return: names of the converted packages
+    """
 
     path_root = pathlib.Path(run_config["environment"]["sentinel_artifacts_path"]).joinpath("Data", "Packages")
-    raw_root = pathlib.Path(run_config["environment"]["sentinel_artifacts_path"]).joinpath("Raw", "Packages")
+    raw_root = get_raw_packages_path(run_config)
 
     if not path_root.exists():
         os.makedirs(path_root)
 
-    for each_generated_log in raw_root.glob("*/"):
-        log = PackageInfoLog.PkgLogObject(each_generated_log)
-        data = log.get_data()
-        name = pathlib.Path(each_generated_log.with_suffix("")).name
+    data_format = get_package_data_format(run_config)
+    write_json = data_format in [DATA_FORMAT_JSON, DATA_FORMAT_BOTH]
+
+    database = None
+    if data_format in [DATA_FORMAT_SQLITE, DATA_FORMAT_BOTH]:
+        database = assetdatabase.AssetDatabase(get_asset_database_path(run_config))
+
+    # hash value, log and the offset and length of the package in the log
+    packages = [(each_log.stem, each_log, None) for each_log in raw_root.glob("*.log")]
+    for each_section_index in section_indexes or []:
+        packages.extend((each_hash_value, each_section_index.log_path, each_section_index.get_section(each_hash_value))
+                        for each_hash_value in each_section_index.hash_values())
+
+    # What each json file and database entry was written from
+    json_manifest = {}
+    database_keys = {}
+    json_manifest_path = path_root.parent.joinpath(JSON_MANIFEST_FILE_NAME)
+    if incremental:
+        json_manifest = _read_json_manifest(json_manifest_path)
+        if database:
+            database_keys = database.get_source_keys()
+
+    include_dependencies = get_package_info_include_dependencies(run_config)
+
+    expected_json_files = {}
+    conversions = []
+    for name, each_generated_log, section in packages:
+
+        package_paths = [None]
+        if hash_mapping and name in hash_mapping.hash_value_mapping:
+            package_paths = hash_mapping.get_filenames_from_hash(name)
+        elif hash_mapping and incremental:
+            # Left over from content that has changed since, the json for it is removed
+            continue
+
+        outputs = []
+        for i, each_package_path in enumerate(package_paths):
+            json_name = get_json_file_name(name, i)
+            package_name = pathlib.Path(json_name).stem
+            json_key = [name, str(each_package_path or ""), PackageInfoLog.PARSER_VERSION, include_dependencies]
+            expected_json_files[json_name] = json_key
+
+            is_json_up_to_date = not write_json or (json_manifest.get(json_name) == json_key and
+                                                    path_root.joinpath(json_name).exists())
+            is_database_up_to_date = not database or database_keys.get(package_name) == json_key
+
+            if is_json_up_to_date and is_database_up_to_date:
+                continue
+
+            json_path = str(path_root.joinpath(json_name)) if write_json else None
+            outputs.append((package_name, json_path, each_package_path, json_key))
+
+        if outputs:
+            conversions.append((str(each_generated_log), section, outputs, include_dependencies, bool(database)))
+
+    number_of_removed_packages = 0
+    if incremental:
+        if write_json:
+            number_of_removed_packages += _remove_stale_json_files(path_root, expected_json_files)
+
+        if database:
+            expected_package_names = set(pathlib.Path(each).stem for each in expected_json_files)
+            removed_package_names = [each for each in database_keys if each not in expected_package_names]
+            database.remove_packages(removed_package_names)
+            number_of_removed_packages += len(removed_package_names)
+
+        L.info("%s out of %s package logs need to be converted", len(conversions), len(packages))
+
+    worker_count = min(get_json_worker_count(run_config), max(len(conversions), 1))
+    L.info("Converting %s package logs with %s workers", len(conversions), worker_count)
+
+    converted_packages = []
+    database_records = []
+
+    def _collect(results):
+        for package_name, json_key, data in results:
+            converted_packages.append(package_name)
+
+            if database:
+                database_records.append((package_name, json_key[0], json_key, data))
+
+                # Writing in batches keeps the number of transactions down without holding everything in memory
+                if len(database_records) >= DATABASE_BATCH_SIZE:
+                    database.upsert_packages(database_records)
+                    del database_records[:]
+
+    if worker_count == 1:
+        for each_conversion in conversions:
+            _collect(_convert_package_log_to_json(each_conversion))
+    else:
+        # Handing out the logs in chunks to keep the overhead of sending work to the processes low
+        chunk_size = max(min(len(conversions) // (worker_count * 4), JSON_MAX_CHUNK_SIZE), 1)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=worker_count) as executor:
+            # map returns the results in the order of the logs no matter which process finishes first
+            for results in executor.map(_convert_package_log_to_json, conversions, chunksize=chunk_size):
+                _collect(results)
+
+    if database:
+        database.upsert_packages(database_records)
+        database.close()
+
+    L.info("Converted %s packages", len(converted_packages))
+
+    if converted_packages or number_of_removed_packages:
+        # The graph is built again from the new data the next time it is used
+        mark_dependency_graph_stale(run_config)
+
+    if write_json:
+        # Only the files that exist go into the manifest so a stopped conversion is picked up on the next run
+        json_manifest = dict((json_name, json_key) for json_name, json_key in expected_json_files.items()
+                             if path_root.joinpath(json_name).exists())
+        _write_json_manifest(json_manifest_path, json_manifest)
+
+    return converted_packages
+
+
+def _read_json_manifest(json_manifest_path):
+
+    if not json_manifest_path.exists():
+        return {}
+
+    try:
+        with open(json_manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        L.warning("Unable to read the json manifest at: %s, converting all package logs", json_manifest_path)
+        return {}
+
+
+def _write_json_manifest(json_manifest_path, json_manifest):
+
+    temp_path = json_manifest_path.with_name(json_manifest_path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(json_manifest, f)
+
+    os.replace(temp_path, json_manifest_path)
+
+
+def _remove_stale_json_files(path_root, expected_json_files):
+    """
+    Removes json for content that is no longer in the logs
+    :return: number of removed files
+    """
+
+    number_of_removed_files = 0
+    for each_json_file in path_root.glob("*.json"):
+        if each_json_file.name not in expected_json_files:
+            os.remove(each_json_file)
+            number_of_removed_files += 1
+
+    if number_of_removed_files:
+        L.info("Removed %s json files for content that is no longer in the project", number_of_removed_files)
+
+    return number_of_removed_files
+
+
+def _convert_package_log_to_json(conversion):
+    """
+    Parses a package log and writes the json for every file that shares its content, runs in the worker processes
+    :param conversion: path to the log, offset and length of the package in the log, the outputs to create, if the
+    import and export tables are included and if the data is sent back for the asset database
+    :return: list of the package name, the key of what it was created from and the data when it is sent back
+    """
+
+    log_path, section, outputs, include_dependencies, return_data = conversion
+
+    results = []
+    for package_name, json_path, package_path, json_key in outputs:
+        log = PackageInfoLog.PkgLogObject(log_path, package_path=package_path, section=section)
+        data = log.get_data(include_dependencies=include_dependencies)
+
+        if json_path:
+            # Writing to a temp file first so a stopped conversion never leaves half written json behind
+            temp_path = json_path + ".tmp"
+            with open(temp_path, 'w') as outfile:
+                json.dump(data, outfile, indent=4)
+
+            os.replace(temp_path, json_path)
+
+        results.append((package_name, json_key, data if return_data else None))
+
+    return results
+
+
+def read_package_references(run_config):
+    """
+    Reads the package references of every converted package, from the asset database when the data is written to it
+    otherwise from the package json
+    :return: dict of asset path to the package names it references
+    """
+
+    if get_package_data_format(run_config) != DATA_FORMAT_JSON:
+        with assetdatabase.AssetDatabase(get_asset_database_path(run_config)) as database:
+            return database.get_package_references()
+
+    path_root = pathlib.Path(run_config["environment"]["sentinel_artifacts_path"]).joinpath("Data", "Packages")
+
+    package_references = {}
+    for each_json_file in path_root.glob("*.json"):
+        with open(each_json_file, "r") as f:
+            data = json.load(f)
+
+        package_references[data["AssetPath"]] = list(data.get("PackageReferences", {}).values())
+
+    return package_references
+
+
+def build_dependency_graph(run_config):
+    """
+    Builds the dependency graph of the project from the converted package data and saves it
+    :return: the dependency graph
+    """
+
+    package_references = {}
+    for asset_path, references in read_package_references(run_config).items():
+        package_references.setdefault(dependencygraph.get_package_name(asset_path), []).extend(references)
+
+    graph = dependencygraph.DependencyGraph.from_references(package_references)
+    graph.save(get_dependency_graph_path(run_config))
+
+    L.info("Dependency graph has %s packages and %s references", len(graph), graph.edge_count)
+
+    return graph
+
+
+def load_dependency_graph(run_config, rebuild=False):
+    """
+    Loads the saved dependency graph, it is built if it does not exist yet or the package data has changed since
+    """
+
+    graph = None
+    if not rebuild:
+        graph = dependencygraph.DependencyGraph.load(get_dependency_graph_path(run_config))
+
+    if graph is None:
+        graph = build_dependency_graph(run_config)
+
+    return graph
+
+
+def mark_dependency_graph_stale(run_config):
+    """
+    Removes the saved dependency graph so it is built from the package data the next time it is loaded
+    """
+
+    graph_file_path = get_dependency_graph_path(run_config)
+    if graph_file_path.exists():
+        L.info("Package data has changed, the dependency graph will be rebuilt when it is used")
+        os.remove(graph_file_path)
+
+
+def get_dependency_graph_path(run_config):
+    """
+    The dependency graph is saved in the data folder next to the package json
+    """
+
+    artifacts_path = pathlib.Path(run_config[ue4_constants.ENVIRONMENT_CATEGORY]["sentinel_artifacts_path"])
+
+    return artifacts_path.joinpath("Data", dependencygraph.DEPENDENCY_GRAPH_FILE_NAME)
+
+
+def get_raw_packages_path(run_config):
+    """
+    Folder the package info output is split into, one file per package named after the hash value of the package
+    """
+
+    artifacts_path = pathlib.Path(run_config[ue4_constants.ENVIRONMENT_CATEGORY]["sentinel_artifacts_path"])
+
+    return artifacts_path.joinpath("Raw", "Packages")
+
+
+def get_raw_logs_path(run_config):
+    """
+    Folder for the package info logs that are kept whole and indexed
+    """
+
+    artifacts_path = pathlib.Path(run_config[ue4_constants.ENVIRONMENT_CATEGORY]["sentinel_artifacts_path"])
+
+    return artifacts_path.joinpath("Raw", "Logs")
+
+
+def get_package_info_split_mode(run_config):
+    """
+    How the package info output is split into packages, defaults to a file per package
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+    split_mode = environment_config.get(ue4_constants.PACKAGE_INFO_SPLIT_MODE, SPLIT_MODE_FILES)
+
+    if split_mode not in SPLIT_MODES:
+        L.error("Package info split mode: %s is not valid, valid modes: %s", split_mode, ", ".join(SPLIT_MODES))
+        sys.exit(1)
+
+    return split_mode
+
+
+def get_json_file_name(hash_value, duplicate_index=0):
+    """
+    The first file with a hash value is named after the hash, any other files with the same content get a suffix
+    """
+
+    if duplicate_index:
+        return hash_value + "_" + str(duplicate_index) + ".json"
+
+    return hash_value + ".json"
+
+
+def create_project_hash_map(run_config, list_of_files, prune=False):
+    """
+    Creates the hash mapping for the files using the hash settings from the config
+    :param prune: removes the files that are not in the list from the hash index, only for the whole project
+    """
+
+    hash_algorithm = get_hash_algorithm(run_config)
+    hash_index = hashindex.FileHashIndex(get_hash_index_path(run_config), hash_algorithm)
+
+    return ProjectHashMap(list_of_files,
+                          get_hash_worker_count(run_config),
+                          hash_index,
+                          hash_algorithm,
+                          get_hash_use_mmap(run_config),
+                          prune)
+
+
+def get_hash_algorithm(run_config):
+    """
+    Hash algorithm used to identify the contents of the files, defaults to md5
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+    hash_algorithm = environment_config.get(ue4_constants.HASH_ALGORITHM, filehashing.DEFAULT_HASH_ALGORITHM)
+
+    if not filehashing.is_hash_algorithm_available(hash_algorithm):
+        L.error("Hash algorithm: %s is not available, available algorithms: %s", hash_algorithm,
+                ", ".join(filehashing.get_available_hash_algorithms()))
+        sys.exit(1)
+
+    return hash_algorithm
+
+
+def get_hash_use_mmap(run_config):
+    """
+    If the files should be memory mapped when hashing them
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+
+    return bool(environment_config.get(ue4_constants.HASH_USE_MMAP, False))
+
+
+def get_cache_link_mode(run_config):
+    """
+    How files are moved between the cache and the work folder, copies by default.  Hardlinks and reflinks avoid
+    copying the data, links fall back to copies when the cache is on a different device
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+    link_mode = environment_config.get(ue4_constants.CACHE_LINK_MODE, fileutilities.LINK_MODE_COPY)
+
+    if link_mode not in fileutilities.LINK_MODES:
+        L.error("Cache link mode: %s is not valid, valid modes: %s", link_mode, ", ".join(fileutilities.LINK_MODES))
+        sys.exit(1)
+
+    return link_mode
+
 
-        path = path_root.joinpath(name + ".json")
+def get_extraction_stats_path(run_config):
+    """
+    The measured extraction times are saved next to the cache folder
+    """
+
+    cache_path = pathlib.Path(run_config[ue4_constants.ENVIRONMENT_CATEGORY][ue4_constants.SENTINEL_CACHE_ROOT])
+
+    return cache_path.parent.joinpath(cache_path.name + "_extraction_stats.json")
+
+
+def get_quarantine_path(run_config):
+    """
+    The list of files that crash the editor is saved next to the cache folder
+    """
+
+    cache_path = pathlib.Path(run_config[ue4_constants.ENVIRONMENT_CATEGORY][ue4_constants.SENTINEL_CACHE_ROOT])
+
+    return cache_path.parent.joinpath(cache_path.name + "_quarantine.json")
+
+
+def get_package_info_max_files_per_chunk(run_config):
+    """
+    Max number of files passed to a single package info commandlet.  Files passed on the command line are limited by
+    the max command line length, with a list file there is no limit unless one is configured
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
 
-        with open(path, 'w') as outfile:
-            json.dump(data, outfile, indent=4)
+    default_max_files = 100
+    if run_config[ue4_constants.COMMANDLET_SETTINGS]["_PkgInfoCommandlet"].get("file_list_flag"):
+        default_max_files = sys.maxsize
+
+    return max(int(environment_config.get(ue4_constants.PACKAGE_INFO_MAX_FILES_PER_CHUNK, default_max_files)), 1)
+
+
+def get_package_info_worker_count(run_config):
+    """
+    Number of package info commandlets that run at the same time, defaults to one
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+
+    return max(int(environment_config.get(ue4_constants.PACKAGE_INFO_WORKER_COUNT, 1)), 1)
+
+
+def get_package_reader(run_config):
+    """
+    How the package data is read, defaults to the package info commandlet
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+    package_reader = environment_config.get(ue4_constants.PACKAGE_INFO_READER, PACKAGE_READER_COMMANDLET)
+
+    if package_reader not in PACKAGE_READERS:
+        L.error("Package reader: %s is not valid, valid readers: %s", package_reader, ", ".join(PACKAGE_READERS))
+        sys.exit(1)
+
+    return package_reader
+
+
+def get_package_data_format(run_config):
+    """
+    Where the converted package data is written, defaults to a json file per package
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+    data_format = environment_config.get(ue4_constants.PACKAGE_DATA_FORMAT, DATA_FORMAT_JSON)
+
+    if data_format not in DATA_FORMATS:
+        L.error("Package data format: %s is not valid, valid formats: %s", data_format, ", ".join(DATA_FORMATS))
+        sys.exit(1)
+
+    return data_format
+
+
+def get_asset_database_path(run_config):
+    """
+    The asset database is saved in the data folder next to the package json
+    """
+
+    artifacts_path = pathlib.Path(run_config[ue4_constants.ENVIRONMENT_CATEGORY]["sentinel_artifacts_path"])
+
+    return artifacts_path.joinpath("Data", assetdatabase.DATABASE_FILE_NAME)
+
+
+def get_package_info_include_dependencies(run_config):
+    """
+    If the import and export tables are added to the package json, they are large so they are left out by default
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+
+    return bool(environment_config.get(ue4_constants.PACKAGE_INFO_INCLUDE_DEPENDENCIES, False))
+
+
+def get_json_worker_count(run_config):
+    """
+    Number of processes converting the package logs to json, defaults to the number of cores on the machine
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+
+    if ue4_constants.JSON_WORKER_COUNT in environment_config:
+        return max(int(environment_config[ue4_constants.JSON_WORKER_COUNT]), 1)
+
+    return os.cpu_count() or 1
+
+
+def get_hash_worker_count(run_config):
+    """
+    Number of threads used when hashing the project files, defaults to the number of cores on the machine
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+
+    if ue4_constants.HASH_WORKER_COUNT in environment_config:
+        return int(environment_config[ue4_constants.HASH_WORKER_COUNT])
+
+    return os.cpu_count() or 1
+
+
+def get_hash_index_path(run_config):
+    """
+    The hash index is saved next to the cache folder so that it follows the cache between runs
+    """
+
+    cache_path = pathlib.Path(run_config[ue4_constants.ENVIRONMENT_CATEGORY][ue4_constants.SENTINEL_CACHE_ROOT])
+
+    return cache_path.parent.joinpath(cache_path.name + "_hash_index.json")
 
 
 def split_list_into_chunks(list_to_split, max_entries_per_list):
@@ -420,14 +1555,59 @@ def split_list_into_chunks(list_to_split, max_entries_per_list):
     return chunks
 
 
-def archive_list_of_files(run_config, list_of_files):
+def archive_list_of_files(run_config, list_of_files, section_indexes=None):
+
+    archive_object = create_extracted_data_archive(run_config, {}, get_hash_algorithm(run_config))
+    archive_object.archive_files(list_of_files)
+
+    for each_section_index in section_indexes or []:
+        archive_object.archive_sections(each_section_index)
+
+    # Keeping the cache within its limits on long lived machines
+    max_size_bytes, max_age_days = get_cache_limits(run_config)
+    if max_size_bytes or max_age_days:
+        archive_object.collect_garbage(max_size_bytes, max_age_days)
+
+
+def create_extracted_data_archive(run_config, file_hash_mappings, hash_algorithm):
+    """
+    Creates the archive object for the cache folder using the cache settings from the config
+    """
 
     cache_path = pathlib.Path(run_config["environment"]["sentinel_cache_path"])
 
-    for source_file in list_of_files:
-        source_file = pathlib.Path(source_file)
-        target_file = cache_path.joinpath(source_file.name)
-        shutil.copy(source_file, target_file)
+    remote_cache = None
+    remote_cache_url = run_config[ue4_constants.ENVIRONMENT_CATEGORY].get(ue4_constants.REMOTE_CACHE_URL)
+    if remote_cache_url:
+        remote_cache = remotecache.RemoteCacheClient(remote_cache_url, hash_algorithm)
+
+    return ExtractedDataArchive(cache_path, file_hash_mappings, hash_algorithm,
+                                get_cache_link_mode(run_config),
+                                get_cache_format(run_config),
+                                remote_cache)
+
+
+def get_cache_limits(run_config):
+    """
+    Size cap in bytes and max age in days for the entries in the cache, 0 means no limit
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+
+    max_size_bytes = int(float(environment_config.get(ue4_constants.CACHE_SIZE_CAP_MB, 0)) * 1024 * 1024)
+    max_age_days = float(environment_config.get(ue4_constants.CACHE_MAX_AGE_DAYS, 0))
+
+    return max_size_bytes, max_age_days
+
+
+def get_cache_format(run_config):
+    """
+    The format of the cache, either one file per asset or compressed pack files
+    """
+
+    environment_config = run_config[ue4_constants.ENVIRONMENT_CATEGORY]
+
+    return environment_config.get(ue4_constants.CACHE_FORMAT, archivestores.ARCHIVE_FORMAT_LOOSE)
 
 
 # TODO move this function to the LogParser package
@@ -0,0 +1,574 @@
+# coding=utf-8
+import logging
+import mmap
+import os
+import pathlib
+import struct
+
+from Editor import dependencygraph
+from Editor.LogProcesser import packageinfolog
+
+L = logging.getLogger(__name__)
+
+PACKAGE_FILE_TAG = 0x9E2A83C1
+PACKAGE_FILE_TAG_SWAPPED = 0xC1832A9E
+
+# Legacy file versions written by UE4, newer versions change the layout of the summary
+OLDEST_SUPPORTED_LEGACY_FILE_VERSION = -7
+NEWEST_SUPPORTED_LEGACY_FILE_VERSION = -4
+
+# UE4 object versions that change the layout of the package header
+VER_UE4_OLDEST_LOADABLE_PACKAGE = 214
+VER_UE4_WORLD_LEVEL_INFO = 224
+VER_UE4_ADDED_CHUNKID_TO_ASSETDATA_AND_UPACKAGE = 278
+VER_UE4_CHANGED_CHUNKID_TO_BE_AN_ARRAY_OF_CHUNKIDS = 326
+VER_UE4_ENGINE_VERSION_OBJECT = 336
+VER_UE4_LOAD_FOR_EDITOR_GAME = 365
+VER_UE4_ADD_STRING_ASSET_REFERENCES_MAP = 384
+VER_UE4_PACKAGE_SUMMARY_HAS_COMPATIBLE_ENGINE_VERSION = 444
+VER_UE4_SERIALIZE_TEXT_IN_PACKAGES = 459
+VER_UE4_COOKED_ASSETS_IN_EDITOR_SUPPORT = 485
+VER_UE4_NAME_HASHES_SERIALIZED = 504
+VER_UE4_PRELOAD_DEPENDENCIES_IN_COOKED_EXPORTS = 507
+VER_UE4_TEMPLATE_INDEX_IN_COOKED_EXPORTS = 508
+VER_UE4_ADDED_SEARCHABLE_NAMES = 510
+VER_UE4_64BIT_EXPORTMAP_SERIALSIZES = 511
+VER_UE4_ADDED_PACKAGE_SUMMARY_LOCALIZATION_ID = 516
+VER_UE4_ADDED_PACKAGE_OWNER = 518
+VER_UE4_NON_OUTER_PACKAGE_IMPORT = 520
+VER_UE4_ASSETREGISTRY_DEPENDENCYFLAGS = 521
+VER_UE4_NEWEST_SUPPORTED = 522
+
+PKG_FILTER_EDITOR_ONLY = 0x80000000
+
+CHAPTER_DIVIDER = packageinfolog.CHAPTER_DIVIDER
+
+INT16 = struct.Struct("<H")
+INT32 = struct.Struct("<i")
+UINT32 = struct.Struct("<I")
+INT64 = struct.Struct("<q")
+GUID = struct.Struct("<4I")
+NAME_REFERENCE = struct.Struct("<ii")
+ENGINE_VERSION = struct.Struct("<HHHI")
+
+
+class UnsupportedPackageError(Exception):
+    """
+    The package can not be read without the editor, the package info commandlet is used for it instead
+    """
+
+
+class PackageFileReader:
+    """
+    Reads little endian values from the package data, reads past the end of the data raise UnsupportedPackageError
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def seek(self, position):
+
+        if position < 0 or position > len(self.data):
+            raise UnsupportedPackageError("Offset %s is outside of the package" % position)
+
+        self.position = position
+
+    def _unpack(self, value_struct):
+
+        end = self.position + value_struct.size
+        if end > len(self.data):
+            raise UnsupportedPackageError("Unexpected end of the package at offset %s" % self.position)
+
+        values = value_struct.unpack_from(self.data, self.position)
+        self.position = end
+
+        return values
+
+    def read_uint16(self):
+        return self._unpack(INT16)[0]
+
+    def read_int32(self):
+        return self._unpack(INT32)[0]
+
+    def read_uint32(self):
+        return self._unpack(UINT32)[0]
+
+    def read_int64(self):
+        return self._unpack(INT64)[0]
+
+    def read_name_reference(self):
+        """
+        :return: index into the name table and the number of the name
+        """
+
+        return self._unpack(NAME_REFERENCE)
+
+    def read_bool(self):
+        return self.read_uint32() != 0
+
+    def read_guid(self):
+        return "".join("%08X" % each for each in self._unpack(GUID))
+
+    def read_count(self):
+        """
+        Reads the length of an array, a length that can not fit in the rest of the package means the layout is off
+        """
+
+        count = self.read_int32()
+        if count < 0 or count > len(self.data) - self.position:
+            raise UnsupportedPackageError("Invalid array length %s at offset %s" % (count, self.position))
+
+        return count
+
+    def read_string(self):
+        """
+        Reads an FString, positive lengths are ansi and negative lengths are utf-16 characters, both include the null
+        terminator
+        """
+
+        length = self.read_int32()
+        if length == 0:
+            return ""
+
+        if length > 0:
+            encoding, byte_count = "latin-1", length
+        else:
+            encoding, byte_count = "utf-16-le", -length * 2
+
+        end = self.position + byte_count
+        if end > len(self.data):
+            raise UnsupportedPackageError("Invalid string length %s at offset %s" % (length, self.position))
+
+        value = bytes(self.data[self.position:end]).decode(encoding, errors="ignore")
+        self.position = end
+
+        return value.rstrip("\0")
+
+    def read_engine_version(self):
+        major, minor, patch, changelist = self._unpack(ENGINE_VERSION)
+        branch = self.read_string()
+
+        return "%s.%s.%s-%s+%s" % (major, minor, patch, changelist & 0x7FFFFFFF, branch)
+
+
+class PackageSummary:
+    """
+    The FPackageFileSummary at the start of a package file
+    """
+
+    def __init__(self, reader):
+
+        self.tag = reader.read_uint32()
+        if self.tag == PACKAGE_FILE_TAG_SWAPPED:
+            raise UnsupportedPackageError("Byte swapped packages are not supported")
+        if self.tag != PACKAGE_FILE_TAG:
+            raise UnsupportedPackageError("Not a package file")
+
+        self.legacy_file_version = reader.read_int32()
+        if not OLDEST_SUPPORTED_LEGACY_FILE_VERSION <= self.legacy_file_version <= \
+                NEWEST_SUPPORTED_LEGACY_FILE_VERSION:
+            raise UnsupportedPackageError("Legacy file version %s is not supported" % self.legacy_file_version)
+
+        # The UE3 version is only missing in legacy version -4
+        if self.legacy_file_version != -4:
+            reader.read_int32()
+
+        self.file_version_ue4 = reader.read_int32()
+        self.file_version_licensee = reader.read_int32()
+
+        if self.file_version_ue4 == 0 and self.file_version_licensee == 0:
+            raise UnsupportedPackageError("Unversioned packages are not supported")
+
+        if not VER_UE4_OLDEST_LOADABLE_PACKAGE <= self.file_version_ue4 <= VER_UE4_NEWEST_SUPPORTED:
+            raise UnsupportedPackageError("File version %s is not supported" % self.file_version_ue4)
+
+        self.custom_versions = self._read_custom_versions(reader)
+
+        self.total_header_size = reader.read_int32()
+        self.folder_name = reader.read_string()
+        self.package_flags = reader.read_uint32()
+        self.name_count = reader.read_int32()
+        self.name_offset = reader.read_int32()
+
+        version = self.file_version_ue4
+        filter_editor_only = self.is_filter_editor_only()
+
+        self.localization_id = ""
+        if not filter_editor_only and version >= VER_UE4_ADDED_PACKAGE_SUMMARY_LOCALIZATION_ID:
+            self.localization_id = reader.read_string()
+
+        self.gatherable_text_data_count = 0
+        self.gatherable_text_data_offset = 0
+        if version >= VER_UE4_SERIALIZE_TEXT_IN_PACKAGES:
+            self.gatherable_text_data_count = reader.read_int32()
+            self.gatherable_text_data_offset = reader.read_int32()
+
+        self.export_count = reader.read_int32()
+        self.export_offset = reader.read_int32()
+        self.import_count = reader.read_int32()
+        self.import_offset = reader.read_int32()
+        self.depends_offset = reader.read_int32()
+
+        self.soft_package_references_count = 0
+        self.soft_package_references_offset = 0
+        if version >= VER_UE4_ADD_STRING_ASSET_REFERENCES_MAP:
+            self.soft_package_references_count = reader.read_int32()
+            self.soft_package_references_offset = reader.read_int32()
+
+        self.searchable_names_offset = 0
+        if version >= VER_UE4_ADDED_SEARCHABLE_NAMES:
+            self.searchable_names_offset = reader.read_int32()
+
+        self.thumbnail_table_offset = reader.read_int32()
+        self.guid = reader.read_guid()
+
+        if not filter_editor_only and version >= VER_UE4_ADDED_PACKAGE_OWNER:
+            # Persistent guid, the owner guid was only saved until the next version
+            reader.read_guid()
+            if version < VER_UE4_NON_OUTER_PACKAGE_IMPORT:
+                reader.read_guid()
+
+        self.generations = []
+        for _ in range(reader.read_count()):
+            self.generations.append((reader.read_int32(), reader.read_int32()))
+
+        if version >= VER_UE4_ENGINE_VERSION_OBJECT:
+            self.saved_by_engine_version = reader.read_engine_version()
+        else:
+            self.saved_by_engine_version = "4.0.0-%s+" % reader.read_int32()
+
+        self.compatible_with_engine_version = self.saved_by_engine_version
+        if version >= VER_UE4_PACKAGE_SUMMARY_HAS_COMPATIBLE_ENGINE_VERSION:
+            self.compatible_with_engine_version = reader.read_engine_version()
+
+        self.compression_flags = reader.read_uint32()
+        if reader.read_count():
+            raise UnsupportedPackageError("Compressed packages are not supported")
+
+        self.package_source = reader.read_uint32()
+
+        # Additional packages to cook
+        for _ in range(reader.read_count()):
+            reader.read_string()
+
+        if self.legacy_file_version > -7:
+            # Texture allocations, always empty
+            reader.read_int32()
+
+        self.asset_registry_data_offset = reader.read_int32()
+        self.bulk_data_start_offset = reader.read_int64()
+
+        self.world_tile_info_data_offset = 0
+        if version >= VER_UE4_WORLD_LEVEL_INFO:
+            self.world_tile_info_data_offset = reader.read_int32()
+
+        self.chunk_ids = []
+        if version >= VER_UE4_CHANGED_CHUNKID_TO_BE_AN_ARRAY_OF_CHUNKIDS:
+            self.chunk_ids = [reader.read_int32() for _ in range(reader.read_count())]
+        elif version >= VER_UE4_ADDED_CHUNKID_TO_ASSETDATA_AND_UPACKAGE:
+            self.chunk_ids = [reader.read_int32()]
+
+        self.preload_dependency_count = 0
+        self.preload_dependency_offset = 0
+        if version >= VER_UE4_PRELOAD_DEPENDENCIES_IN_COOKED_EXPORTS:
+            self.preload_dependency_count = reader.read_int32()
+            self.preload_dependency_offset = reader.read_int32()
+
+    def is_filter_editor_only(self):
+        return bool(self.package_flags & PKG_FILTER_EDITOR_ONLY)
+
+    def _read_custom_versions(self, reader):
+        """
+        The layout of the custom versions depends on the legacy file version
+        :return: list of the custom version key and version
+        """
+
+        custom_versions = []
+        if self.legacy_file_version > -2:
+            return custom_versions
+
+        for _ in range(reader.read_count()):
+            if self.legacy_file_version == -2:
+                key = "%08X" % reader.read_uint32()
+                custom_versions.append((key, reader.read_int32()))
+
+            elif self.legacy_file_version >= -5:
+                key = reader.read_guid()
+                custom_versions.append((key, reader.read_int32()))
+
+                # Friendly name
+                reader.read_string()
+            else:
+                key = reader.read_guid()
+                custom_versions.append((key, reader.read_int32()))
+
+        return custom_versions
+
+
+class PackageFile:
+    """
+    Reads the package summary, the name, import and export tables and the asset registry data of a .uasset or .umap
+    file without the editor.  Only the header of the package is read through a memory map
+    """
+
+    def __init__(self, file_path):
+
+        self.file_path = pathlib.Path(file_path)
+
+        self.summary = None
+        self.names = []
+        self.imports = []
+        self.exports = []
+
+        # Object path, class name and the tags of each asset in the package
+        self.assets = []
+        self.asset_registry_size = 0
+
+        self._read()
+
+    def _read(self):
+
+        try:
+            with open(self.file_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    raise UnsupportedPackageError("Empty file")
+
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                    reader = PackageFileReader(mapped_file)
+
+                    self.summary = PackageSummary(reader)
+                    self._read_names(reader)
+                    self._read_imports(reader)
+                    self._read_exports(reader)
+                    self._read_asset_registry_data(reader)
+        except OSError as e:
+            raise UnsupportedPackageError("Unable to read the package: %s" % e)
+
+    def _read_names(self, reader):
+
+        reader.seek(self.summary.name_offset)
+
+        has_name_hashes = self.summary.file_version_ue4 >= VER_UE4_NAME_HASHES_SERIALIZED
+        for _ in range(self.summary.name_count):
+            self.names.append(reader.read_string())
+
+            if has_name_hashes:
+                reader.read_uint16()
+                reader.read_uint16()
+
+    def _read_name(self, reader):
+        """
+        Reads an FName, the number is added as a suffix the same way the engine displays it
+        """
+
+        name_index, number = reader.read_name_reference()
+        if not 0 <= name_index < len(self.names):
+            raise UnsupportedPackageError("Invalid name index %s at offset %s" % (name_index, reader.position))
+
+        if number:
+            return "%s_%s" % (self.names[name_index], number - 1)
+
+        return self.names[name_index]
+
+    def _read_imports(self, reader):
+
+        reader.seek(self.summary.import_offset)
+
+        has_package_name = self.summary.file_version_ue4 >= VER_UE4_NON_OUTER_PACKAGE_IMPORT and \
+            not self.summary.is_filter_editor_only()
+
+        for _ in range(self.summary.import_count):
+            each_import = {"ClassPackage": self._read_name(reader),
+                           "ClassName": self._read_name(reader),
+                           "OuterIndex": reader.read_int32(),
+                           "ObjectName": self._read_name(reader)}
+
+            if has_package_name:
+                each_import["PackageName"] = self._read_name(reader)
+
+            self.imports.append(each_import)
+
+    def _read_exports(self, reader):
+
+        reader.seek(self.summary.export_offset)
+        version = self.summary.file_version_ue4
+
+        for _ in range(self.summary.export_count):
+            each_export = {"ClassIndex": reader.read_int32(),
+                           "SuperIndex": reader.read_int32()}
+
+            if version >= VER_UE4_TEMPLATE_INDEX_IN_COOKED_EXPORTS:
+                each_export["TemplateIndex"] = reader.read_int32()
+
+            each_export["OuterIndex"] = reader.read_int32()
+            each_export["ObjectName"] = self._read_name(reader)
+            each_export["ObjectFlags"] = reader.read_uint32()
+
+            if version >= VER_UE4_64BIT_EXPORTMAP_SERIALSIZES:
+                each_export["SerialSize"] = reader.read_int64()
+                each_export["SerialOffset"] = reader.read_int64()
+            else:
+                each_export["SerialSize"] = reader.read_int32()
+                each_export["SerialOffset"] = reader.read_int32()
+
+            each_export["ForcedExport"] = reader.read_bool()
+            each_export["NotForClient"] = reader.read_bool()
+            each_export["NotForServer"] = reader.read_bool()
+            each_export["PackageGuid"] = reader.read_guid()
+            each_export["PackageFlags"] = reader.read_uint32()
+
+            if version >= VER_UE4_LOAD_FOR_EDITOR_GAME:
+                each_export["NotAlwaysLoadedForEditorGame"] = reader.read_bool()
+
+            if version >= VER_UE4_COOKED_ASSETS_IN_EDITOR_SUPPORT:
+                each_export["IsAsset"] = reader.read_bool()
+
+            if version >= VER_UE4_PRELOAD_DEPENDENCIES_IN_COOKED_EXPORTS:
+                # First export dependency and the four dependency counts
+                for _ in range(5):
+                    reader.read_int32()
+
+            self.exports.append(each_export)
+
+    def _read_asset_registry_data(self, reader):
+
+        if self.summary.asset_registry_data_offset <= 0:
+            return
+
+        reader.seek(self.summary.asset_registry_data_offset)
+
+        if self.summary.file_version_ue4 >= VER_UE4_ASSETREGISTRY_DEPENDENCYFLAGS and \
+                not self.summary.is_filter_editor_only():
+            # Offset of the dependency data
+            reader.read_int64()
+
+        for _ in range(reader.read_count()):
+            object_path = reader.read_string()
+            class_name = reader.read_string()
+
+            tags = []
+            for _ in range(reader.read_count()):
+                tags.append((reader.read_string(), reader.read_string()))
+
+            self.assets.append((object_path, class_name, tags))
+
+        self.asset_registry_size = reader.position - self.summary.asset_registry_data_offset
+
+    def get_package_name(self):
+        return dependencygraph.get_package_name(str(self.file_path))
+
+    def get_object_name(self, package_index):
+        """
+        Name of the object a package index points to, positive indexes are exports and negative indexes are imports
+        """
+
+        if package_index > 0 and package_index <= len(self.exports):
+            return self.exports[package_index - 1]["ObjectName"]
+
+        if package_index < 0 and -package_index <= len(self.imports):
+            return self.imports[-package_index - 1]["ObjectName"]
+
+        return "None"
+
+    def get_package_references(self):
+        """
+        :return: names of the packages imported by the package, in the order of the import table
+        """
+
+        package_name = self.get_package_name()
+
+        references = []
+        for each_import in self.imports:
+            if each_import["OuterIndex"] == 0 and each_import["ClassName"] == "Package" and \
+                    each_import["ObjectName"] != package_name and each_import["ObjectName"] not in references:
+                references.append(each_import["ObjectName"])
+
+        return references
+
+    def get_section_lines(self):
+        """
+        Writes the package in the same layout as the package info commandlet so it goes through the same parsing
+        and storage as the commandlet output
+        :return: list of lines
+        """
+
+        summary = self.summary
+        package_name = self.get_package_name()
+
+        lines = ["Package '%s' Summary" % package_name,
+                 CHAPTER_DIVIDER,
+                 "         Filename: %s" % os.path.abspath(self.file_path),
+                 "     File Version: %s" % summary.file_version_ue4,
+                 "   Engine Version: %s" % summary.saved_by_engine_version,
+                 "   Compat Version: %s" % summary.compatible_with_engine_version,
+                 "     PackageFlags: %X" % summary.package_flags,
+                 "        NameCount: %s" % summary.name_count,
+                 "       NameOffset: %s" % summary.name_offset,
+                 "      ImportCount: %s" % summary.import_count,
+                 "     ImportOffset: %s" % summary.import_offset,
+                 "      ExportCount: %s" % summary.export_count,
+                 "     ExportOffset: %s" % summary.export_offset,
+                 "Compression Flags: %X" % summary.compression_flags,
+                 "             Guid: %s" % summary.guid,
+                 CHAPTER_DIVIDER,
+                 "Packages referenced by %s:" % package_name]
+
+        lines += ["      %s) %s" % (i, each) for i, each in enumerate(self.get_package_references())]
+
+        lines += [CHAPTER_DIVIDER,
+                  "Asset Registry Size: %s" % self.asset_registry_size,
+                  "Number of assets with Asset Registry data: %s" % len(self.assets)]
+
+        for i, (object_path, class_name, tags) in enumerate(self.assets):
+            lines.append("   %s) %s'%s' (%s Tags)" % (i, class_name, object_path, len(tags)))
+
+            # Every tag has to stay on its own line
+            lines += ['      "%s": "%s"' % (key, " ".join(value.splitlines())) for key, value in tags]
+
+        lines += [CHAPTER_DIVIDER, "Import Map"]
+        for i, each_import in enumerate(self.imports):
+            lines += ["\tImport %s: '%s'" % (i, each_import["ObjectName"]),
+                      "\t\t       Outer: '%s' (%s)" % (self.get_object_name(each_import["OuterIndex"]),
+                                                      each_import["OuterIndex"]),
+                      "\t\tClassPackage: %s" % each_import["ClassPackage"],
+                      "\t\t   ClassName: %s" % each_import["ClassName"]]
+
+        lines += [CHAPTER_DIVIDER, "Export Map"]
+        for i, each_export in enumerate(self.exports):
+            lines += ["\tExport %s: '%s'" % (i, each_export["ObjectName"]),
+                      "\t\t       Class: '%s' (%s)" % (self.get_object_name(each_export["ClassIndex"]),
+                                                      each_export["ClassIndex"]),
+                      "\t\t      Parent: '%s' (%s)" % (self.get_object_name(each_export["SuperIndex"]),
+                                                      each_export["SuperIndex"]),
+                      "\t\t       Outer: '%s' (%s)" % (self.get_object_name(each_export["OuterIndex"]),
+                                                      each_export["OuterIndex"]),
+                      "\t\t ObjectFlags: 0x%08X" % each_export["ObjectFlags"],
+                      "\t\t        Size: %s" % each_export["SerialSize"],
+                      "\t\t      Offset: %s" % each_export["SerialOffset"]]
+
+        lines.append(CHAPTER_DIVIDER)
+
+        return [each + "\n" for each in lines]
+
+
+def read_package_section(file_path):
+    """
+    Reads a package without the editor
+    :return: lines of the package in the package info commandlet layout
+    :raises UnsupportedPackageError: when the package has to be read by the commandlet
+    """
+
+    return PackageFile(file_path).get_section_lines()
+
+
+def read_package_data(file_path, include_dependencies=False):
+    """
+    Reads a package without the editor
+    :return: dict with the same fields as the json data of the package
+    """
+
+    log = packageinfolog.PkgLogObject(file_path, package_path=os.path.abspath(file_path),
+                                      lines=read_package_section(file_path))
+
+    return log.get_data(include_dependencies=include_dependencies)
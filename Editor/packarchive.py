@@ -0,0 +1,346 @@
+# coding=utf-8
+import io
+import logging
+import os
+import pathlib
+import struct
+import time
+import uuid
+import zlib
+
+from Editor import archivemanifest
+
+L = logging.getLogger(__name__)
+
+# Every record in a pack starts with the magic, the length of the hash value and the length of the compressed data
+RECORD_MAGIC = b"SPK1"
+RECORD_HEADER = struct.Struct("<4sHI")
+
+SEGMENT_PREFIX = "pack_"
+SEGMENT_SUFFIX = ".pack"
+
+# Compacting rewrites every live entry, it is only worth it once this much of the segments is removed data
+COMPACT_DEAD_FRACTION = 0.25
+
+# Block size used when checksumming a restored file
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+
+def read_segment_records(segment_path):
+    """
+    Walks through the records of a pack segment without decompressing them, a truncated record at the end of the
+    segment is ignored
+    :return: generator of hash value, offset of the compressed data and the length of the compressed data
+    """
+
+    segment_size = os.path.getsize(segment_path)
+
+    with open(segment_path, "rb") as f:
+        offset = 0
+        while offset + RECORD_HEADER.size <= segment_size:
+            magic, hash_length, data_length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+
+            if magic != RECORD_MAGIC:
+                L.error("Invalid record in: %s at offset: %s", segment_path, offset)
+                return
+
+            hash_value = f.read(hash_length).decode("ascii")
+            data_offset = offset + RECORD_HEADER.size + hash_length
+
+            if data_offset + data_length > segment_size:
+                L.warning("Truncated record at the end of: %s", segment_path)
+                return
+
+            f.seek(data_length, io.SEEK_CUR)
+
+            yield hash_value, data_offset, data_length
+            offset = data_offset + data_length
+
+
+class PackIndex(archivemanifest.ArchiveManifest):
+    """
+    Index from hash value to the segment, offset and length of the compressed data
+    """
+
+    MANIFEST_FILE_NAME = "_pack_index.json"
+
+    def _rebuild_from_archive_folder(self):
+        """
+        Scans the segments to recreate the index if it went missing
+        """
+
+        L.info("Building the pack index from the segments in: %s", self.archive_folder_path)
+
+        self._entries = {}
+        for each_segment in sorted(self.archive_folder_path.glob(SEGMENT_PREFIX + "*" + SEGMENT_SUFFIX)):
+            segment_modified_time = each_segment.stat().st_mtime
+            for hash_value, offset, length in read_segment_records(each_segment):
+                # The uncompressed size is not stored in the record
+                self.add(hash_value, 0, segment_modified_time, segment=each_segment.name, offset=offset,
+                         length=length)
+
+        self.save()
+
+
+class PackFileStore:
+    """
+    Stores the archived logs compressed in append only pack segments.  Each archive run writes its own segment so
+    agents sharing the archive never write into the same file, compact merges the segments and drops removed entries
+    """
+
+    def __init__(self, archive_folder_path, compression_level=6):
+
+        self.archive_folder_path = pathlib.Path(archive_folder_path)
+        self.compression_level = compression_level
+
+        self.index = PackIndex(self.archive_folder_path)
+
+    def __contains__(self, hash_value):
+        return hash_value in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def hash_values(self):
+        return self.index.hash_values()
+
+    def get_size(self, hash_value):
+        return self.index.get_entry(hash_value)["length"]
+
+    def get_total_size(self):
+        """
+        Size of the live compressed data, removed entries take up space until the archive is compacted
+        """
+
+        return sum(self.get_size(each_hash_value) for each_hash_value in self.hash_values())
+
+    def get_segment_size(self):
+        """
+        Size of the segments on disk, live and removed entries
+        """
+
+        return sum(os.path.getsize(each_segment) for each_segment in self.get_segment_paths())
+
+    def get_dead_size(self):
+        """
+        Bytes in the segments that belong to removed or rewritten entries
+        """
+
+        live_size = sum(RECORD_HEADER.size + len(each_hash_value) + self.get_size(each_hash_value)
+                        for each_hash_value in self.hash_values())
+
+        return max(self.get_segment_size() - live_size, 0)
+
+    def should_compact(self):
+        """
+        :return: if enough of the segments is removed data to make rewriting the live entries worth it
+        """
+
+        segment_size = self.get_segment_size()
+
+        return segment_size > 0 and self.get_dead_size() > segment_size * COMPACT_DEAD_FRACTION
+
+    def get_least_recently_used(self):
+        """
+        Returns the entries ordered from the least recently used with the compressed size of each entry
+        """
+
+        return [(hash_value, last_used, self.get_size(hash_value))
+                for hash_value, last_used, _ in self.index.get_least_recently_used()]
+
+    def _get_new_segment_path(self):
+        name = "%s%s_%s%s" % (SEGMENT_PREFIX, time.strftime("%Y%m%d%H%M%S"), uuid.uuid4().hex[:8], SEGMENT_SUFFIX)
+        return self.archive_folder_path.joinpath(name)
+
+    def _write_records(self, segment_path, records):
+        """
+        Appends the records to a segment and adds them to the index
+        :param records: iterable of hash value and uncompressed data
+        """
+
+        if not self.archive_folder_path.exists():
+            os.makedirs(self.archive_folder_path)
+
+        number_of_records = 0
+        with open(segment_path, "ab") as segment:
+            offset = segment.tell()
+
+            for hash_value, data in records:
+                encoded_hash_value = hash_value.encode("ascii")
+                compressed_data = zlib.compress(data, self.compression_level)
+
+                segment.write(RECORD_HEADER.pack(RECORD_MAGIC, len(encoded_hash_value), len(compressed_data)))
+                segment.write(encoded_hash_value)
+                segment.write(compressed_data)
+
+                data_offset = offset + RECORD_HEADER.size + len(encoded_hash_value)
+                last_used = None
+                existing_entry = self.index.get_entry(hash_value)
+                if existing_entry:
+                    # Rewriting an entry when compacting should not change when it was last used
+                    last_used = existing_entry.get("last_used")
+
+                self.index.add(hash_value, len(data), last_used, segment=segment_path.name, offset=data_offset,
+                               length=len(compressed_data), checksum=zlib.crc32(data))
+
+                offset = data_offset + len(compressed_data)
+                number_of_records += 1
+
+            # Making sure the data is on disk before the index points to it
+            segment.flush()
+            os.fsync(segment.fileno())
+
+        if not number_of_records and os.path.getsize(segment_path) == 0:
+            os.remove(segment_path)
+
+        return number_of_records
+
+    def add_files(self, list_of_files):
+        """
+        Compresses the files into a new segment and records them in the index
+        :param list_of_files: log files named after the hash value of the asset
+        """
+
+        if not list_of_files:
+            return
+
+        def _read_files():
+            for each_file in list_of_files:
+                each_file = pathlib.Path(each_file)
+                yield each_file.stem, each_file.read_bytes()
+
+        self._write_records(self._get_new_segment_path(), _read_files())
+        self.index.save()
+
+    def add_data(self, records):
+        """
+        Compresses data that is not in a file of its own into a new segment
+        :param records: iterable of hash value and data
+        """
+
+        if self._write_records(self._get_new_segment_path(), records):
+            self.index.save()
+
+    def read(self, hash_value):
+        """
+        Random access to the uncompressed data of a hash value
+        """
+
+        entry = self.index.get_entry(hash_value)
+
+        with open(self.archive_folder_path.joinpath(entry["segment"]), "rb") as segment:
+            segment.seek(entry["offset"])
+            return zlib.decompress(segment.read(entry["length"]))
+
+    def restore_files(self, hash_values, target_folder):
+        """
+        Writes the archived data into the target folder, the entries are read in segment order to keep the reads
+        sequential
+        :return: hash values of entries whose segment no longer exists
+        """
+
+        target_folder = pathlib.Path(target_folder)
+        if not target_folder.exists():
+            os.makedirs(target_folder)
+
+        def _location(hash_value):
+            entry = self.index.get_entry(hash_value)
+            return entry["segment"], entry["offset"]
+
+        missing_hash_values = []
+        restored_hash_values = []
+        for each_hash_value in sorted(hash_values, key=_location):
+            target = target_folder.joinpath(each_hash_value + ".log")
+
+            if self._is_restored(self.index.get_entry(each_hash_value), target):
+                restored_hash_values.append(each_hash_value)
+                continue
+
+            try:
+                data = self.read(each_hash_value)
+            except (OSError, zlib.error):
+                L.error("Unable to read: %s from the pack archive", each_hash_value)
+                missing_hash_values.append(each_hash_value)
+                continue
+
+            temp_target = target.with_name(target.name + ".tmp")
+            temp_target.write_bytes(data)
+            os.replace(temp_target, target)
+            restored_hash_values.append(each_hash_value)
+
+        self.index.touch(restored_hash_values)
+        self.index.save()
+
+        L.info("Restored %s files from the pack archive", len(hash_values) - len(missing_hash_values))
+
+        return missing_hash_values
+
+    @staticmethod
+    def _is_restored(entry, target):
+        """
+        Checks if the target already holds the archived data.  A file with the same size can still be a stale or half
+        written copy so the checksum of the content has to match, entries without a checksum are always restored
+        """
+
+        checksum = entry.get("checksum")
+        if checksum is None or not target.exists() or target.stat().st_size != entry["size"]:
+            return False
+
+        target_checksum = 0
+        with open(target, "rb") as f:
+            for block in iter(lambda: f.read(CHECKSUM_BLOCK_SIZE), b""):
+                target_checksum = zlib.crc32(block, target_checksum)
+
+        return target_checksum == checksum
+
+    def remove(self, hash_values):
+        """
+        Removes the entries from the index, the data stays in the segments until the archive is compacted
+        """
+
+        for each_hash_value in hash_values:
+            self.index.remove(each_hash_value)
+
+        self.index.save()
+
+    def get_segment_paths(self):
+        return sorted(self.archive_folder_path.glob(SEGMENT_PREFIX + "*" + SEGMENT_SUFFIX))
+
+    def compact(self):
+        """
+        Rewrites the live entries into a single segment and deletes the old segments
+        """
+
+        old_segments = self.get_segment_paths()
+        size_before = sum(os.path.getsize(each_segment) for each_segment in old_segments)
+
+        live_hash_values = sorted(self.hash_values(),
+                                  key=lambda hash_value: (self.index.get_entry(hash_value)["segment"],
+                                                          self.index.get_entry(hash_value)["offset"]))
+
+        unreadable_hash_values = []
+
+        def _read_live_entries():
+            for each_hash_value in live_hash_values:
+                try:
+                    yield each_hash_value, self.read(each_hash_value)
+                except (OSError, zlib.error):
+                    L.error("Unable to read: %s from the pack archive, dropping it", each_hash_value)
+                    unreadable_hash_values.append(each_hash_value)
+
+        new_segment = self._get_new_segment_path()
+        self._write_records(new_segment, _read_live_entries())
+
+        for each_hash_value in unreadable_hash_values:
+            self.index.remove(each_hash_value)
+        self.index.save()
+
+        # Only removing the segments that were rewritten, other machines might have added segments in the meantime
+        referenced_segments = set(self.index.get_entry(each)["segment"] for each in self.index.hash_values())
+        for each_segment in old_segments:
+            if each_segment != new_segment and each_segment.name not in referenced_segments:
+                os.remove(each_segment)
+
+        size_after = sum(os.path.getsize(each_segment) for each_segment in self.get_segment_paths())
+        L.info("Compacted %s entries from %s segments, %s bytes -> %s bytes",
+               len(live_hash_values), len(old_segments), size_before, size_after)
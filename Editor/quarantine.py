@@ -0,0 +1,76 @@
+# coding=utf-8
+import json
+import logging
+import os
+import pathlib
+import time
+
+L = logging.getLogger(__name__)
+
+
+class PackageQuarantine:
+    """
+    List of assets that crash the package info commandlet.  Entries are keyed by the hash value of the asset so that
+    the asset is tried again as soon as its content changes
+    """
+
+    def __init__(self, quarantine_file_path):
+
+        self.quarantine_file_path = pathlib.Path(quarantine_file_path)
+
+        # hash value -> information about the asset
+        self._entries = {}
+        self._is_dirty = False
+
+        self._load()
+
+    def __contains__(self, hash_value):
+        return hash_value in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self):
+
+        if not self.quarantine_file_path.exists():
+            return
+
+        try:
+            with open(self.quarantine_file_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            L.warning("Unable to read the quarantine list at: %s", self.quarantine_file_path)
+
+    def add(self, hash_value, file_path):
+        L.warning("Quarantining %s, it crashes the package info commandlet", file_path)
+
+        self._entries[hash_value] = {"path": str(file_path), "time": time.time()}
+        self._is_dirty = True
+
+    def remove_unused(self, hash_values_in_project):
+        """
+        Drops the entries for content that is no longer in the project
+        """
+
+        for each_hash_value in list(self._entries.keys()):
+            if each_hash_value not in hash_values_in_project:
+                del self._entries[each_hash_value]
+                self._is_dirty = True
+
+    def get_paths(self):
+        return [entry["path"] for entry in self._entries.values()]
+
+    def save(self):
+
+        if not self._is_dirty:
+            return
+
+        if not self.quarantine_file_path.parent.exists():
+            os.makedirs(self.quarantine_file_path.parent)
+
+        temp_path = self.quarantine_file_path.with_name(self.quarantine_file_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=4)
+
+        os.replace(temp_path, self.quarantine_file_path)
+        self._is_dirty = False
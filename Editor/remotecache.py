@@ -0,0 +1,159 @@
+# coding=utf-8
+import concurrent.futures
+import json
+import logging
+import pathlib
+import shutil
+import tempfile
+import urllib.error
+import urllib.request
+
+L = logging.getLogger(__name__)
+
+# Number of hash values sent in each existence query
+EXISTS_BATCH_SIZE = 1000
+
+
+class RemoteCacheClient:
+    """
+    Talks to a content addressed cache server over http.  Entries are stored per hash algorithm so that caches created
+    with different algorithms are never mixed
+
+        GET  <url>/cas/<algorithm>/<hash value>     returns the data or 404
+        PUT  <url>/cas/<algorithm>/<hash value>     stores the data
+        POST <url>/cas/<algorithm>/exists           {"hash_values": [...]} -> {"hash_values": [...present...]}
+    """
+
+    def __init__(self, base_url, hash_algorithm, timeout=30, worker_count=8):
+
+        self.base_url = base_url.rstrip("/")
+        self.hash_algorithm = hash_algorithm
+        self.timeout = timeout
+        self.worker_count = worker_count
+
+    def _get_url(self, name):
+        return "%s/cas/%s/%s" % (self.base_url, self.hash_algorithm, name)
+
+    def exists(self, hash_values):
+        """
+        Asks the server which of the hash values it has, the hash values are sent in batches
+        :return: set of the hash values that exist on the server
+        """
+
+        hash_values = list(hash_values)
+        existing_hash_values = set()
+
+        for i in range(0, len(hash_values), EXISTS_BATCH_SIZE):
+            body = json.dumps({"hash_values": hash_values[i:i + EXISTS_BATCH_SIZE]}).encode("utf-8")
+            request = urllib.request.Request(self._get_url("exists"), data=body, method="POST",
+                                             headers={"Content-Type": "application/json"})
+
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                existing_hash_values.update(json.loads(response.read().decode("utf-8"))["hash_values"])
+
+        return existing_hash_values
+
+    def get(self, hash_value):
+        """
+        :return: data stored for the hash value or None if the server does not have it
+        """
+
+        try:
+            with urllib.request.urlopen(self._get_url(hash_value), timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def put(self, hash_value, data):
+
+        request = urllib.request.Request(self._get_url(hash_value), data=data, method="PUT",
+                                         headers={"Content-Type": "application/octet-stream"})
+
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def download_files(self, hash_values, target_folder):
+        """
+        Downloads the hash values into the target folder as <hash value>.log files
+        :return: list of the files that were downloaded
+        """
+
+        target_folder = pathlib.Path(target_folder)
+
+        def _download(hash_value):
+            data = self.get(hash_value)
+            if data is None:
+                return None
+
+            target = target_folder.joinpath(hash_value + ".log")
+            target.write_bytes(data)
+
+            return target
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+            downloaded_files = [each for each in executor.map(_download, hash_values) if each]
+
+        return downloaded_files
+
+    def upload(self, hash_values, read_data):
+        """
+        Uploads the data of the hash values, hash values the server already has are skipped
+        :param read_data: function that returns the data of a hash value
+        """
+
+        hash_values = list(dict.fromkeys(hash_values))
+        existing_hash_values = self.exists(hash_values)
+
+        def _upload(hash_value):
+            self.put(hash_value, read_data(hash_value))
+
+        hash_values_to_upload = [each for each in hash_values if each not in existing_hash_values]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+            list(executor.map(_upload, hash_values_to_upload))
+
+        L.info("Uploaded %s files to the remote cache, %s already existed", len(hash_values_to_upload),
+               len(existing_hash_values))
+
+
+def fill_from_remote_cache(remote_cache, store, hash_values):
+    """
+    Read through layer, fetches the hash values that are missing from the local store from the remote cache and adds
+    them to the local store.  Errors talking to the server are logged and the local store is used as is
+    :return: hash values that were fetched
+    """
+
+    hash_values_to_fetch = [each for each in hash_values if each not in store]
+
+    if not hash_values_to_fetch:
+        return []
+
+    temp_folder = tempfile.mkdtemp(prefix="sentinel_remote_cache_")
+    try:
+        available_hash_values = remote_cache.exists(hash_values_to_fetch)
+        L.info("Remote cache has %s out of %s missing entries", len(available_hash_values), len(hash_values_to_fetch))
+
+        downloaded_files = remote_cache.download_files(sorted(available_hash_values), temp_folder)
+        store.add_files(downloaded_files)
+
+        return [each_file.stem for each_file in downloaded_files]
+
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        L.warning("Unable to read from the remote cache at: %s, %s", remote_cache.base_url, e)
+        return []
+
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+
+
+def push_to_remote_cache(remote_cache, hash_values, read_data):
+    """
+    Write through layer, uploads newly archived data.  Errors are logged since the local archive already has the data
+    """
+
+    try:
+        remote_cache.upload(hash_values, read_data)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        L.warning("Unable to write to the remote cache at: %s, %s", remote_cache.base_url, e)
@@ -0,0 +1,182 @@
+# coding=utf-8
+import json
+import logging
+import mmap
+import os
+import pathlib
+
+L = logging.getLogger(__name__)
+
+SECTION_INDEX_SUFFIX = ".sections.json"
+
+SUMMARY_START = b"Package '"
+SUMMARY_END = b"' Summary"
+FILENAME_PREFIX = b"Filename: "
+
+
+def is_start_of_package_summary(line):
+    """
+    :param line: line of the package info output, either the raw bytes or the decoded text
+    """
+
+    if isinstance(line, str):
+        return SUMMARY_START.decode() in line and SUMMARY_END.decode() in line
+
+    return SUMMARY_START in line and SUMMARY_END in line
+
+
+def get_section_index_path(log_path):
+    log_path = pathlib.Path(log_path)
+    return log_path.with_name(log_path.name + SECTION_INDEX_SUFFIX)
+
+
+def read_section(log_path, offset, length):
+    """
+    Reads a section of a raw log through a memory map so only the pages of the section are read
+    :return: bytes of the section
+    """
+
+    if length <= 0:
+        return b""
+
+    with open(log_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_log:
+            return mapped_log[offset:offset + length]
+
+
+class SectionIndex:
+    """
+    Index from the hash value of a package to the byte offset and length of its section in a raw package info log,
+    the index is saved next to the log
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, log_path):
+
+        self.log_path = pathlib.Path(log_path)
+        self.index_file_path = get_section_index_path(self.log_path)
+
+        # hash value -> offset, length
+        self._entries = {}
+
+        self._load()
+
+    def __contains__(self, hash_value):
+        return hash_value in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def hash_values(self):
+        return list(self._entries.keys())
+
+    def get_section(self, hash_value):
+        """
+        :return: offset and length of the section
+        """
+
+        return self._entries[hash_value]
+
+    def add(self, hash_value, offset, length):
+        self._entries[hash_value] = [offset, length]
+
+    def read(self, hash_value):
+        offset, length = self._entries[hash_value]
+        return read_section(self.log_path, offset, length)
+
+    def read_sections(self, hash_values=None):
+        """
+        Reads several sections with a single memory map, the sections are read in the order they are in the log
+        :return: generator of hash value and the bytes of the section
+        """
+
+        if hash_values is None:
+            hash_values = self.hash_values()
+
+        hash_values = sorted(hash_values, key=lambda hash_value: self._entries[hash_value][0])
+        if not hash_values or os.path.getsize(self.log_path) == 0:
+            return
+
+        with open(self.log_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_log:
+                for each_hash_value in hash_values:
+                    offset, length = self._entries[each_hash_value]
+                    yield each_hash_value, mapped_log[offset:offset + length]
+
+    def _load(self):
+
+        if not self.index_file_path.exists():
+            return
+
+        try:
+            with open(self.index_file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            if data.get("version") != self.INDEX_VERSION:
+                return
+
+            self._entries = data["entries"]
+        except (OSError, ValueError, KeyError):
+            L.warning("Unable to read the section index at: %s", self.index_file_path)
+
+    def save(self):
+
+        temp_path = self.index_file_path.with_name(self.index_file_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.INDEX_VERSION, "log": self.log_path.name, "entries": self._entries}, f)
+
+        os.replace(temp_path, self.index_file_path)
+
+
+def get_asset_path_from_section_line(line):
+    """
+    :return: absolute path of the asset if the line is the filename line of a section, otherwise an empty string
+    """
+
+    if FILENAME_PREFIX not in line:
+        return ""
+
+    path = line.split(FILENAME_PREFIX, 1)[1].decode("utf-8", errors="ignore").rstrip("\r\n")
+
+    return os.path.abspath(path)
+
+
+def build_section_index(log_path, hash_mapping):
+    """
+    Scans a raw package info log and indexes its sections by the hash value of the package, the log is not modified
+    :return: saved section index
+    """
+
+    section_index = SectionIndex(log_path)
+
+    section_start = None
+    section_hash_value = None
+
+    def _add_section(end):
+        if section_start is not None and section_hash_value:
+            section_index.add(section_hash_value, section_start, end - section_start)
+
+    with open(log_path, "rb") as f:
+        offset = 0
+        for line in iter(f.readline, b""):
+            if is_start_of_package_summary(line):
+                _add_section(offset)
+                section_start = offset
+                section_hash_value = None
+
+            elif section_start is not None and section_hash_value is None:
+                asset_path = get_asset_path_from_section_line(line)
+                if asset_path:
+                    section_hash_value = hash_mapping.get_hash_from_filename(asset_path)
+                    if not section_hash_value:
+                        L.error("Unable to find the hash value of: %s", asset_path)
+
+            offset += len(line)
+
+        _add_section(offset)
+
+    section_index.save()
+    L.info("Indexed %s sections in: %s", len(section_index), log_path)
+
+    return section_index
@@ -7,7 +7,7 @@ import pprint
 import click
 
 import ue4_constants
-from Editor import buildcommands, commandlets, packageinspection, automationrunner
+from Editor import buildcommands, commandlets, dependencygraph, packageinspection, automationrunner
 from Game import clientrunner, clientutilities
 
 L = logging.getLogger(__name__)
@@ -165,25 +165,87 @@ def commandlet(ctx, task):
 
 
 @project.command()
+@click.option('--rebuild_json', is_flag=True, default=False, help="Converts every package log to json again")
 @click.pass_context
-def refresh_asset_info(ctx):
+def refresh_asset_info(ctx, rebuild_json):
     """ extracts raw information about assets"""
     run_config = ctx.obj['RUN_CONFIG']
 
-    # Runs package inspection on all the files
+    # Runs package inspection on all the files, the output is split into a file per package as it comes in
     inspector = packageinspection.BasePackageInspection(run_config)
     inspector.run()
 
-    # Splits the raw inspected files into individual files
-    splitter = packageinspection.RawLogSplitter(run_config, inspector.extracted_files)
-    splitter.run()
-
     # Archive the newly created files
-    packageinspection.archive_list_of_files(run_config, splitter.output_files)
+    packageinspection.archive_list_of_files(run_config, inspector.extracted_files, inspector.section_indexes)
 
     # TODO move the convert file list to the same pattern as the inspector and the splitter
-    packageinspection.convert_file_list_to_json(run_config)
+    packageinspection.convert_file_list_to_json(run_config, inspector.hash_mapping, inspector.section_indexes,
+                                                incremental=not rebuild_json)
+
+
+@project.command()
+@click.pass_context
+@click.option('--asset', required=True, help="Package name or path of the asset")
+@click.option('--direction', type=click.Choice(['dependents', 'dependencies']), default='dependents',
+              help="Find the packages that depend on the asset or the packages the asset depends on")
+@click.option('--depth', type=int, default=0, help="Number of levels to follow, 0 follows every level")
+@click.option('--rebuild', is_flag=True, default=False, help="Builds the dependency graph from the package data")
+def deps(ctx, asset, direction, depth, rebuild):
+    """ finds the transitive dependents or dependencies of an asset"""
+    run_config = ctx.obj['RUN_CONFIG']
+
+    graph = packageinspection.load_dependency_graph(run_config, rebuild)
+
+    package_name = dependencygraph.get_package_name(asset)
+    if package_name not in graph:
+        print(f"Asset: {asset} is not in the dependency graph")
+        sys.exit(1)
+
+    if direction == 'dependents':
+        packages = graph.get_dependents(package_name, depth)
+    else:
+        packages = graph.get_dependencies(package_name, depth)
+
+    if ctx.obj['OUTPUT_TYPE'] == 'text':
+        print("\n".join(packages))
+    elif ctx.obj['OUTPUT_TYPE'] == 'json':
+        print(json.dumps({"asset": package_name, direction: packages}, indent=4))
+
 
+@project.command()
+@click.pass_context
+def compact_cache(ctx):
+    """ merges the pack files in the cache and drops removed entries"""
+    run_config = ctx.obj['RUN_CONFIG']
+
+    archive_object = packageinspection.create_extracted_data_archive(run_config, {},
+                                                                     packageinspection.get_hash_algorithm(run_config))
+    archive_object.compact()
+
+
+@project.command()
+@click.pass_context
+@click.option('--max_size_mb', type=float, default=None, help="Size cap of the cache, defaults to the config value")
+@click.option('--max_age_days', type=float, default=None, help="Remove entries not used for this many days")
+def gc_cache(ctx, max_size_mb, max_age_days):
+    """ evicts the least recently used entries from the cache"""
+    run_config = ctx.obj['RUN_CONFIG']
+
+    max_size_bytes, config_max_age_days = packageinspection.get_cache_limits(run_config)
+
+    if max_size_mb is not None:
+        max_size_bytes = int(max_size_mb * 1024 * 1024)
+    if max_age_days is None:
+        max_age_days = config_max_age_days
+
+    archive_object = packageinspection.create_extracted_data_archive(run_config, {},
+                                                                     packageinspection.get_hash_algorithm(run_config))
+    removed_hash_values = archive_object.collect_garbage(max_size_bytes, max_age_days)
+
+    if ctx.obj['OUTPUT_TYPE'] == 'text':
+        print(f"Removed {len(removed_hash_values)} entries from the cache")
+    elif ctx.obj['OUTPUT_TYPE'] == 'json':
+        print(json.dumps({"removed": removed_hash_values}, indent=4))
 
 
 @cli.group()
@@ -0,0 +1,74 @@
+"""
+Measures building, loading and querying the dependency graph on a synthetic project
+
+Run from the root of the repository:
+    python -m Tools.benchmark_dependency_graph --packages 180000
+"""
+import pathlib
+import random
+import tempfile
+import time
+
+import click
+
+from Editor import dependencygraph
+
+
+def create_synthetic_references(number_of_packages, references_per_package):
+    """
+    Packages reference packages with a lower index, a few shared packages are referenced by most of the project
+    """
+
+    random.seed(0)
+
+    names = ["/Game/Synthetic/Folder_%s/Asset_%s" % (i % 500, i) for i in range(number_of_packages)]
+    shared_names = names[:50]
+
+    package_references = {}
+    for i, name in enumerate(names):
+        references = [random.choice(shared_names)] if i >= len(shared_names) else []
+        if i:
+            references += [names[random.randrange(i)]
+                           for _ in range(random.randint(0, references_per_package * 2))]
+
+        package_references[name] = references
+
+    return package_references
+
+
+@click.command()
+@click.option('--packages', default=180000, help="Number of packages in the graph")
+@click.option('--references', default=5, help="Average number of references of a package")
+@click.option('--queries', default=20, help="Number of packages to query")
+def benchmark(packages, references, queries):
+    """Benchmarks the dependency graph"""
+
+    package_references = create_synthetic_references(packages, references)
+
+    start = time.perf_counter()
+    graph = dependencygraph.DependencyGraph.from_references(package_references)
+    print(f"Built {len(graph)} nodes, {graph.edge_count} edges in {time.perf_counter() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        graph_file_path = pathlib.Path(temp_dir).joinpath(dependencygraph.DEPENDENCY_GRAPH_FILE_NAME)
+        graph.save(graph_file_path)
+
+        start = time.perf_counter()
+        graph = dependencygraph.DependencyGraph.load(graph_file_path)
+        print(f"Loaded {graph_file_path.stat().st_size / (1024 * 1024):.1f} MB in "
+              f"{time.perf_counter() - start:.2f}s")
+
+    random.seed(1)
+    names = random.sample(graph.names, queries)
+
+    for description, query in [("dependents", graph.get_dependents), ("dependencies", graph.get_dependencies)]:
+        start = time.perf_counter()
+        reached = sum(len(query(each_name)) for each_name in names)
+        seconds = time.perf_counter() - start
+
+        print(f"Transitive {description}: {seconds / queries * 1000:.1f}ms per query, "
+              f"{reached / queries:.0f} packages reached on average")
+
+
+if __name__ == "__main__":
+    benchmark()
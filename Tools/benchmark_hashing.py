@@ -0,0 +1,78 @@
+"""
+Compares the hash algorithms available to the ProjectHashMap on a synthetic asset corpus
+
+Run from the root of the repository:
+    python -m Tools.benchmark_hashing --small_files 2000 --large_files 4
+"""
+import os
+import pathlib
+import tempfile
+import time
+
+import click
+
+from Editor import filehashing, packageinspection
+
+
+def create_synthetic_corpus(root, small_files, small_file_size, large_files, large_file_size):
+    """
+    Writes a mix of small data assets and large map / texture packages filled with random data
+    """
+
+    content_root = pathlib.Path(root).joinpath("Content")
+    os.makedirs(content_root)
+
+    files = []
+    for i in range(small_files):
+        path = content_root.joinpath("DA_Small_%s.uasset" % i)
+        path.write_bytes(os.urandom(small_file_size))
+        files.append(path)
+
+    for i in range(large_files):
+        path = content_root.joinpath("M_Large_%s.umap" % i)
+        with open(path, "wb") as f:
+            # Writing in blocks to not hold the whole package in memory
+            for _ in range(large_file_size // (1024 * 1024)):
+                f.write(os.urandom(1024 * 1024))
+        files.append(path)
+
+    return files
+
+
+def time_hash_run(files, algorithm, use_mmap, worker_count):
+
+    start = time.perf_counter()
+    packageinspection.ProjectHashMap(files, worker_count, hash_algorithm=algorithm, use_mmap=use_mmap)
+
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option('--small_files', default=2000, help="Number of small assets in the corpus")
+@click.option('--small_file_size', default=64 * 1024, help="Size of each small asset in bytes")
+@click.option('--large_files', default=4, help="Number of large packages in the corpus")
+@click.option('--large_file_size_mb', default=256, help="Size of each large package in MB")
+@click.option('--workers', default=os.cpu_count() or 1, help="Number of hashing threads")
+@click.option('--repeat', default=3, help="Number of runs per algorithm, the fastest run is reported")
+def benchmark(small_files, small_file_size, large_files, large_file_size_mb, workers, repeat):
+    """Benchmarks the hash algorithms with and without mmap reads"""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = create_synthetic_corpus(temp_dir, small_files, small_file_size,
+                                        large_files, large_file_size_mb * 1024 * 1024)
+
+        total_mb = sum(each_file.stat().st_size for each_file in files) / (1024 * 1024)
+        print(f"Corpus: {len(files)} files, {total_mb:.1f} MB, {workers} workers")
+
+        # Warming up the file system cache so the first algorithm is not penalized
+        time_hash_run(files, filehashing.DEFAULT_HASH_ALGORITHM, False, workers)
+
+        print(f"{'algorithm':<12}{'mmap':<8}{'seconds':>10}{'MB/s':>10}")
+        for algorithm in filehashing.get_available_hash_algorithms():
+            for use_mmap in [False, True]:
+                seconds = min(time_hash_run(files, algorithm, use_mmap, workers) for _ in range(repeat))
+                print(f"{algorithm:<12}{str(use_mmap):<8}{seconds:>10.3f}{total_mb / seconds:>10.1f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,106 @@
+"""
+Measures the throughput of the package info log parser on a synthetic set of package logs
+
+Run from the root of the repository:
+    python -m Tools.benchmark_parser --packages 5000
+"""
+import os
+import pathlib
+import random
+import tempfile
+import time
+
+import click
+
+from Editor.LogProcesser import packageinfolog
+
+CHAPTER_DIVIDER = packageinfolog.CHAPTER_DIVIDER
+
+
+def create_package_log(asset_path, references, registry_tags, imports):
+    """
+    Writes the lines of a package section in the same layout as the package info commandlet
+    """
+
+    package_name = "/Game/" + asset_path.split("/Content/")[1].rsplit(".", 1)[0]
+    asset_name = package_name.rsplit("/", 1)[1]
+
+    lines = ["Package '%s' Summary" % package_name,
+             CHAPTER_DIVIDER,
+             "         Filename: %s" % asset_path,
+             "     File size: %s" % random.randint(1000, 10000000),
+             "     Tag: 0x9E2A83C1",
+             "     File Version: 516",
+             "     Names: %s" % random.randint(10, 2000),
+             "     Imports: %s" % imports,
+             "     Package Flags: 0x00040000",
+             "",
+             CHAPTER_DIVIDER,
+             "Packages referenced by %s:" % package_name]
+
+    lines += ["      %s) /Game/Shared/Reference_%s" % (i, i) for i in range(references)]
+
+    lines += [CHAPTER_DIVIDER,
+              "Asset Registry Size:   %s" % random.randint(100, 5000),
+              "Number of assets with Asset Registry data: 1",
+              "   0) Texture2D'%s.%s' (%s Tags)" % (package_name, asset_name, registry_tags + 1),
+              '      "AssetImportData": "[{ "RelativeFilename" : "../Source/%s.png", "Timestamp" : "1500000000", '
+              '"FileMD5" : "0123456789abcdef" }]"' % asset_name]
+
+    lines += ['      "Tag%s": "%s"' % (i, random.choice(["TC_Default", "512", "True", "None"]))
+              for i in range(registry_tags)]
+
+    lines.append(CHAPTER_DIVIDER)
+    for i in range(imports):
+        lines += ["Import %s: 'Import_%s'" % (i, i),
+                  "   ClassPackage: '/Script/CoreUObject'",
+                  "   ClassName: 'Package'",
+                  "   Outer: 'None'"]
+
+    lines.append(CHAPTER_DIVIDER)
+
+    return "\n".join(lines) + "\n"
+
+
+def create_synthetic_logs(root, number_of_packages):
+
+    random.seed(0)
+
+    files = []
+    for i in range(number_of_packages):
+        asset_path = "D:/Project/Content/Textures/T_Synthetic_%s.uasset" % i
+        path = pathlib.Path(root).joinpath("%s.log" % i)
+        path.write_text(create_package_log(asset_path, random.randint(0, 40), random.randint(2, 30),
+                                           random.randint(0, 60)), encoding="utf-8")
+        files.append(path)
+
+    return files
+
+
+def time_parse_run(files):
+
+    start = time.perf_counter()
+    for each_file in files:
+        packageinfolog.PkgLogObject(each_file).get_data()
+
+    return time.perf_counter() - start
+
+
+@click.command()
+@click.option('--packages', default=5000, help="Number of package logs to parse")
+@click.option('--repeat', default=3, help="Number of runs, the fastest run is reported")
+def benchmark(packages, repeat):
+    """Benchmarks the package info log parser"""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = create_synthetic_logs(temp_dir, packages)
+        total_mb = sum(os.path.getsize(each_file) for each_file in files) / (1024 * 1024)
+
+        print(f"Corpus: {len(files)} package logs, {total_mb:.1f} MB")
+
+        seconds = min(time_parse_run(files) for _ in range(repeat))
+        print(f"{seconds:.3f}s, {len(files) / seconds:.0f} packages/s, {total_mb / seconds:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,132 @@
+"""
+Minimal content addressed cache server for the extraction archive, used for testing the remote cache and for small
+setups where the build agents share a single machine.
+
+Run from the root of the repository:
+    python -m Tools.cache_server --root D:/SentinelRemoteCache --port 8642
+
+Then point the remote_cache_url in the environment config to http://<host>:8642
+"""
+import http.server
+import json
+import os
+import pathlib
+import re
+import threading
+
+import click
+
+# Hash algorithms and hash values are only allowed to contain these characters so they can't escape the root folder
+VALID_NAME = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+class CacheRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    # Set on the class before the server starts
+    cache_root = pathlib.Path(".")
+
+    def _parse_path(self):
+        """
+        :return: hash algorithm and hash value or operation name from /cas/<algorithm>/<name>
+        """
+
+        parts = self.path.strip("/").split("/")
+
+        if len(parts) != 3 or parts[0] != "cas" or not VALID_NAME.match(parts[1]) or not VALID_NAME.match(parts[2]):
+            return None, None
+
+        return parts[1], parts[2]
+
+    def _get_entry_path(self, hash_algorithm, hash_value):
+        # Spreading the entries over sub folders to keep the folders small
+        return self.cache_root.joinpath(hash_algorithm, hash_value[:2], hash_value)
+
+    def _send(self, code, data=b"", content_type="application/octet-stream"):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        hash_algorithm, hash_value = self._parse_path()
+        if not hash_algorithm:
+            return self._send(400)
+
+        entry_path = self._get_entry_path(hash_algorithm, hash_value)
+        if not entry_path.exists():
+            return self._send(404)
+
+        self._send(200, entry_path.read_bytes())
+
+    do_HEAD = do_GET
+
+    def do_PUT(self):
+        hash_algorithm, hash_value = self._parse_path()
+        if not hash_algorithm:
+            return self._send(400)
+
+        data = self._read_body()
+
+        entry_path = self._get_entry_path(hash_algorithm, hash_value)
+        if not entry_path.parent.exists():
+            os.makedirs(entry_path.parent, exist_ok=True)
+
+        # Writing to a temp file first so readers never get a partial entry
+        temp_path = entry_path.with_name(entry_path.name + "." + str(threading.get_ident()) + ".tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, entry_path)
+
+        self._send(201)
+
+    def do_POST(self):
+        hash_algorithm, operation = self._parse_path()
+        if not hash_algorithm or operation != "exists":
+            return self._send(400)
+
+        try:
+            hash_values = json.loads(self._read_body().decode("utf-8"))["hash_values"]
+        except (ValueError, KeyError):
+            return self._send(400)
+
+        existing_hash_values = [each for each in hash_values
+                                if VALID_NAME.match(each) and self._get_entry_path(hash_algorithm, each).exists()]
+
+        self._send(200, json.dumps({"hash_values": existing_hash_values}).encode("utf-8"), "application/json")
+
+
+def create_server(root, host="0.0.0.0", port=8642):
+    """
+    Creates the server without starting it
+    """
+
+    handler = type("BoundCacheRequestHandler", (CacheRequestHandler,), {"cache_root": pathlib.Path(root)})
+
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+
+@click.command()
+@click.option('--root', required=True, help="Folder where the cache entries are stored")
+@click.option('--host', default="0.0.0.0", help="Interface to listen on")
+@click.option('--port', default=8642, help="Port to listen on")
+def serve(root, host, port):
+    """Runs the cache server until it is interrupted"""
+
+    server = create_server(root, host, port)
+    print(f"Serving cache from {root} on {host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,124 +1,170 @@
-import pathlib
-import pprint
-import json
+"""
+Writes a csv report per asset type with the asset registry data and the source file of the assets
+
+The package data is read once, either from the package json folder or from the asset database:
+    python -m Tools.find_asset_files --input D:/SentinelArtifacts/Data/Packages --output D:/ProjectInfo/_data
+    python -m Tools.find_asset_files --input D:/SentinelArtifacts/Data/assets.db --output D:/ProjectInfo/_data \
+        --filter_path /Content/Assets --asset_type Texture2D
+"""
+import array
 import csv
-import os 
-from datetime import datetime
-
-path = pathlib.Path(r"D:\SentinelArtifacts\GISLI-PC\Data\Packages")
-out_path = pathlib.Path( r"S:\Daedalus\ProjectInfo\_data")
-
-def get_asset_registry_headers(filter_path, asset_type=""):
-    """ Return the keys based on the data that we are extracting"""
-    keys = []
-    number_of_files = len(list(path.glob("*.json")))
+import json
+import os
+import pathlib
+from datetime import datetime, timezone
 
-    print(asset_type)
-    for i, file_path in enumerate(path.glob("*.json")):
+import click
 
-        with open(file_path) as json_file:
-            data = json.load(json_file)
+from Editor import assetdatabase, assetrecords
 
-            if not data["AssetType"] == asset_type:
-                # Skipping types we that we don't care about
-                continue
+# Columns written before the asset registry keys
+LEADING_COLUMNS = ["Timestamp", "AssetName", "AssetType", "SourceExists", "RelativeFilename", "AssetPath"]
 
+# Parts of the package data the rows are made from, the rest is not kept
+REPORT_DATA_KEYS = ["UnrealFileName", "AssetPath", "AssetType", "AssetRegistry"]
 
-            for each_key in data["AssetRegistry"].keys():
-                if each_key not in keys:
-                    keys.append(each_key)
 
-    return keys
+def iter_package_data(input_path):
+    """
+    Reads the package data from a folder of package json or from the asset database
+    :return: generator of the package data
+    """
 
-def get_asset_types(filter_path):
-    types = []
-    number_of_files = len(list(path.glob("*.json")))
+    input_path = pathlib.Path(input_path)
 
-    for i, file_path in enumerate(path.glob("*.json")):
+    if input_path.is_file():
+        with assetdatabase.AssetDatabase(input_path) as database:
+            yield from database.get_packages()
+        return
 
+    for file_path in input_path.glob("*.json"):
         with open(file_path) as json_file:
-            data = json.load(json_file)
-
-            if data["AssetType"] not in types:
-                types.append(data["AssetType"])
+            yield json.load(json_file)
 
-    return types
 
 def get_asset_registry(data):
     """ Return the asset registry if its available"""
     if "AssetRegistry" in data and "AssetImportData" in data["AssetRegistry"]:
         return data["AssetRegistry"]
 
+
 def should_include(data, filter_path):
     "checks if the file is in the correct path based on the filter"
     return "AssetPath" in data and data["AssetPath"].startswith(filter_path)
 
-def parse_asset_name(out_name, asset_type="", filter_path=""):
-
-    file_name = asset_type + ".csv"
-    out_file_path = out_path.joinpath(file_name)
-    print(out_file_path)
-
-    with open(out_file_path, 'w', newline='') as csvfile:
-        header = get_asset_registry_headers(filter_path, asset_type=asset_type)
-        
-        header.insert(0, "AssetPath")
-        header.insert(0, "RelativeFilename")
-        header.insert(0, "SourceExists")
-        header.insert(0, "AssetType")
-        header.insert(0, "AssetName")
-        header.insert(0, "Timestamp")
-        writer = csv.DictWriter(csvfile, fieldnames=header)
-
-        writer.writeheader()
-        for file_path in path.glob("*.json"):
-            with open(file_path) as json_file:
-
-                data = json.load(json_file)
-                if should_include(data, filter_path):
-                    
-                    if not data["AssetType"] == asset_type:
-                        # Skipping types we that we don't care about
-                        continue
-
-                    if "AssetRegistry" in data and "AssetImportData" in data["AssetRegistry"]:
-                        
-                        import_data = get_asset_registry(data)
-                        import_data["AssetPath"] = data["AssetPath"]
-                        import_data["AssetType"] = data["AssetType"]
-                        import_data["AssetName"] = data["UnrealFileName"]
-                        
-                        if "AssetImportData" in import_data:
-                            assetImportData = import_data["AssetImportData"]
-
-                            # TODO fix is that there is a space needed in the relative filename key
-                            if "RelativeFilename " in assetImportData:
-                                import_data["RelativeFilename"] = assetImportData["RelativeFilename "]
-                                import_data["SourceExists"] = os.path.exists(assetImportData["RelativeFilename "])
-                                if "Timestamp " in assetImportData: 
-                                    ts = assetImportData["Timestamp "]
-                                    if ts > 0:
-                                        time_stamp = datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-                                        import_data["Timestamp"] = time_stamp
-
-                            del import_data["AssetImportData"]
-
-                        else:
-                            ready_data = import_data
-
-                        writer.writerow(import_data)
-
-def parse_texture_data():
-
-    for file_path in path.glob("*.json"):
-        with open(file_path) as json_file:
-            data = json.load(json_file)
-            if "AssetType" in data and data["AssetType"] == "Texture2D":
-                asset_registry = get_asset_registry(data)
 
-                if asset_registry:
-                    pprint.pprint(asset_registry)
+def get_report_row(record, source_root):
+    """
+    Flattens the asset registry and the import data of an asset record into a row
+    """
+
+    import_data = record.asset_registry
+    import_data["AssetPath"] = record.asset_path
+    import_data["AssetType"] = record.asset_type
+    import_data["AssetName"] = record.unreal_file_name
+
+    asset_import_data = import_data.pop("AssetImportData")
+    if isinstance(asset_import_data, dict):
+
+        # TODO fix is that there is a space needed in the relative filename key
+        if "RelativeFilename " in asset_import_data:
+            relative_filename = asset_import_data["RelativeFilename "]
+            import_data["RelativeFilename"] = relative_filename
+            import_data["SourceExists"] = os.path.exists(os.path.join(source_root, relative_filename))
+
+            if "Timestamp " in asset_import_data:
+                ts = asset_import_data["Timestamp "]
+                if isinstance(ts, (int, float)) and ts > 0:
+                    time_stamp = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                    import_data["Timestamp"] = time_stamp
+
+    return import_data
+
+
+class AssetReport:
+    """
+    Groups the assets by type in a single pass over the package data and writes the csv of every type together.  Only
+    the assets that end up in the report are kept in an asset record table, the rows are only made while writing
+    """
+
+    def __init__(self, filter_path="", asset_types=None, source_root="."):
+
+        self.filter_path = filter_path
+        self.asset_types = set(asset_types) if asset_types else None
+        self.source_root = source_root
+
+        # Asset type -> asset registry keys in the order they were found, and the indexes of the records of the type
+        self.headers = {}
+        self.record_indexes = {}
+
+        self.records = assetrecords.AssetRecordTable()
+
+    def add(self, data):
+
+        asset_type = data.get("AssetType")
+        if self.asset_types is not None and asset_type not in self.asset_types:
+            # Skipping types we that we don't care about
+            return
+
+        # The columns come from every asset of the type, not only the ones in the filter path
+        header = self.headers.setdefault(asset_type, {})
+        for each_key in data.get("AssetRegistry", {}):
+            header[each_key] = None
+
+        record_indexes = self.record_indexes.setdefault(asset_type, array.array("I"))
+        if should_include(data, self.filter_path) and get_asset_registry(data):
+            record = self.records.add(dict((each_key, data[each_key]) for each_key in REPORT_DATA_KEYS))
+            record_indexes.append(record.index)
+
+    def write(self, out_path):
+        """
+        Writes a csv per asset type
+        :return: paths of the written files
+        """
+
+        out_path = pathlib.Path(out_path)
+        if not out_path.exists():
+            os.makedirs(out_path)
+
+        written_files = []
+        for asset_type in sorted(self.headers):
+            out_file_path = out_path.joinpath(asset_type + ".csv")
+
+            header = LEADING_COLUMNS + [each for each in self.headers[asset_type] if each not in LEADING_COLUMNS]
+
+            with open(out_file_path, 'w', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=header)
+                writer.writeheader()
+                writer.writerows(get_report_row(self.records[each_index], self.source_root)
+                                 for each_index in self.record_indexes[asset_type])
+
+            written_files.append(out_file_path)
+
+        return written_files
+
+
+@click.command()
+@click.option('--input', 'input_path', required=True, type=click.Path(exists=True),
+              help="Package json folder (Data/Packages) or asset database (Data/assets.db)")
+@click.option('--output', 'output_path', required=True, help="Folder the csv files are written to")
+@click.option('--filter_path', default="", help="Only reports assets whose path starts with this, like /Content/Assets")
+@click.option('--asset_type', multiple=True, help="Asset types to report, all types when not set")
+@click.option('--source_root', default=".", help="Folder the relative source filenames are checked from")
+def report(input_path, output_path, filter_path, asset_type, source_root):
+    """Writes a csv per asset type with the asset registry data of the assets"""
+
+    asset_report = AssetReport(filter_path, asset_type, source_root)
+
+    number_of_assets = 0
+    for data in iter_package_data(input_path):
+        asset_report.add(data)
+        number_of_assets += 1
+
+    for each_file in asset_report.write(output_path):
+        print(f"Processing {each_file.stem}: {each_file}")
+
+    print(f"Read {number_of_assets} assets")
+
 
-for each_type in get_asset_types("/Content/Assets"):
-    print(f"Processing {each_type}")
-    parse_asset_name(path, asset_type=each_type, filter_path="/Content/Assets")
+if __name__ == "__main__":
+    report()
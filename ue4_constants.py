@@ -32,6 +32,23 @@ SENTINEL_DEFAULT_COOK_FILE_NAME = "sentinel_default_cook_log_name"
 SENTINEL_DEFAULT_COMPILE_FILE_NAME = "sentinel_default_editor_log_name"
 SENTINEL_CLIENT_RUN_CACHE = "sentinel_client_run_output"
 
+# Optional machine specific settings for the package inspection
+HASH_WORKER_COUNT = "hash_worker_count"
+HASH_ALGORITHM = "hash_algorithm"
+HASH_USE_MMAP = "hash_use_mmap"
+CACHE_LINK_MODE = "cache_link_mode"
+CACHE_FORMAT = "cache_format"
+CACHE_SIZE_CAP_MB = "cache_size_cap_mb"
+CACHE_MAX_AGE_DAYS = "cache_max_age_days"
+REMOTE_CACHE_URL = "remote_cache_url"
+PACKAGE_INFO_WORKER_COUNT = "package_info_worker_count"
+PACKAGE_INFO_MAX_FILES_PER_CHUNK = "package_info_max_files_per_chunk"
+PACKAGE_INFO_SPLIT_MODE = "package_info_split_mode"
+PACKAGE_INFO_READER = "package_info_reader"
+PACKAGE_INFO_INCLUDE_DEPENDENCIES = "package_info_include_dependencies"
+JSON_WORKER_COUNT = "json_worker_count"
+PACKAGE_DATA_FORMAT = "package_data_format"
+
 UNREAL_BUILD_SETTINGS_STRUCTURE = "buildconfigs"
 UNREAL_BUILD_PLATFORM_NAME = "build_platform"
 UNREAL_BUILD_COMMAND_NAME = "build_command"